@@ -1,8 +1,10 @@
 import hashlib
 import json
+import threading
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from app.database import db
+from app.metrics import timed, LEDGER_HASH_SECONDS
 
 
 class Block:
@@ -63,12 +65,27 @@ class Blockchain:
     - Supports adding new blocks
     - Supports viewing the full chain
     - Supports basic validation
+
+    The ledger is loaded from MongoDB on first access to `chain`, not when
+    the object is created, so importing this module stays cheap.
     """
 
     def __init__(self):
-        self.chain: List[Block] = []
-        # self.create_genesis_block() included in load_chain
-        self.load_chain()
+        self._chain: Optional[List[Block]] = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def chain(self) -> List[Block]:
+        if self._chain is None:
+            with self._load_lock:
+                if self._chain is None:
+                    # self.create_genesis_block() included in load_chain
+                    self.load_chain()
+        return self._chain
+
+    @chain.setter
+    def chain(self, value: List[Block]):
+        self._chain = value
 
     def load_chain(self):
         """
@@ -77,14 +94,16 @@ class Blockchain:
         docs = list(db.blockchain.find().sort("index", 1))
 
         if not docs:
+            self._chain = []
             self.create_genesis_block()
             return
         
-        # reconstruct each Block from MongoDB
-        self.chain = []
+        # reconstruct each Block from MongoDB (publish the list only once complete)
+        chain = []
         for d in docs:
             block = Block(index=d["index"], timestamp=d["timestamp"], data=d["data"], previous_hash=d["previous_hash"], hash_value=d["hash"])
-            self.chain.append(block)
+            chain.append(block)
+        self.chain = chain
 
     def save_block(self, block: Block):
         """
@@ -121,12 +140,13 @@ class Blockchain:
         }
         """
         latest = self.get_latest_block()
-        new_block = Block(
-            index=latest.index + 1,
-            timestamp=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            data=data,
-            previous_hash=latest.hash,
-        )
+        with timed(LEDGER_HASH_SECONDS):
+            new_block = Block(
+                index=latest.index + 1,
+                timestamp=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                data=data,
+                previous_hash=latest.hash,
+            )
         self.chain.append(new_block)
         self.save_block(new_block)
         return new_block
@@ -157,4 +177,5 @@ class Blockchain:
 
 
 # Create a single global blockchain instance that the app can import/use.
-blockchain = Blockchain()
\ No newline at end of file
+# Cheap to construct: the ledger itself is loaded lazily on first use.
+blockchain = Blockchain()
@@ -1,5 +1,7 @@
 from pymongo import MongoClient
 from dotenv import load_dotenv
+from app.metrics import MongoCommandMetrics
+import threading
 import os
 
 load_dotenv()
@@ -7,30 +9,103 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> MongoClient:
+    """
+    Create the MongoClient on first use instead of at import time,
+    so importing the app (or a script) never opens connections.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(MONGO_URI, event_listeners=[MongoCommandMetrics()])
+    return _client
+
+def get_db():
+    return get_client()[DB_NAME]
+
+
+class _LazyDatabase:
+    """
+    Stand-in for the pymongo Database so existing `from app.database import db`
+    imports keep working. Attribute/item access resolves the real database.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+    def __getitem__(self, name):
+        return get_db()[name]
+
+
+db = _LazyDatabase()
+
+# (collection, keys, options) for init_indexes(), in creation order.
+INDEXES = [
+    ("users", "email", {"unique": True}),
+    ("patients", "email", {}),
+
+    # Predictions (list by patient, newest first)
+    ("predictions", [("patient_email", 1), ("created_at", -1)], {}),
+    # History pagination (cursor = last _id seen)
+    ("predictions", [("patient_email", 1), ("_id", -1)], {}),
+    # Per-patient daily/weekly probability rollups
+    ("prediction_rollups", [("patient_email", 1), ("granularity", 1), ("bucket_start", 1)], {}),
+    # Archived predictions (scripts/archive_predictions.py); stubs are looked up by _id
+    ("prediction_archives", [("patient_email", 1), ("month", -1)], {}),
+
+    # Notes (list by patient, newest first; and by prediction)
+    ("notes", [("patient_email", 1), ("created_at", -1)], {}),
+    ("notes", [("prediction_id", 1)], {}),
+    # Full-text note search (one text index per collection; scope filters applied on top)
+    ("notes", [("note", "text")], {"name": "note_text", "default_language": "english"}),
+
+    # Appointments (list by patient / by doctor, newest first)
+    ("appointments", [("patient_email", 1), ("created_at", -1)], {}),
+    ("appointments", [("doctor_email", 1), ("created_at", -1)], {}),
+    # Scheduling: per-doctor interval lookups and slot claims
+    ("appointments", [("doctor_email", 1), ("start_at", 1), ("end_at", 1)], {}),
+    ("appointment_slots", "appointment_id", {}),
+
+    # Disease catalog (upsert/lookup by code)
+    ("diseases", "code", {"unique": True}),
+    ("diseases", "name", {}),
+
+    # SSE fan-out log for EVENTS_SOURCE=changestream (expires after an hour)
+    ("events", "created_at", {"expireAfterSeconds": 3600}),
+
+    # Shared rate-limit buckets (RATE_LIMIT_STORE=mongo), dropped once idle
+    ("rate_limits", "expires_at", {"expireAfterSeconds": 0}),
+
+    # Shadow-model comparisons (summary groups by candidate)
+    ("shadow_evaluations", [("candidate_version", 1), ("created_at", -1)], {}),
+
+    # Hourly drift sketches, kept for 90 days
+    ("drift_windows", "window_start", {"expireAfterSeconds": 90 * 24 * 3600}),
+
+    # Blockchain database to support persistent log.
+    ("blockchain", [("index", 1)], {"unique": True}),
+]
 
 def init_indexes():
     """
     Create helpful indexes (MongoDB will auto-skip if they already exist).
-    This ensures:
-    - No two users can have the same email.
-    - Quick lookups by email in the patients collection.
+    Each index is created independently, so one failure (e.g. a unique index
+    over existing duplicates) doesn't skip the rest. Returns the failures as
+    (collection, keys, error) tuples.
+
+    Not run on app startup anymore; use `python -m app.scripts.init_indexes`.
     """
-    try:
-        db.users.create_index("email", unique=True)
-        db.patients.create_index("email")
-        
-        # Predictions (list by patient, newest first)
-        db.predictions.create_index([("patient_email", 1), ("created_at", -1)])
-
-        # Notes (list by patient, newest first; and by prediction)
-        db.notes.create_index([("patient_email", 1), ("created_at", -1)])
-        db.notes.create_index([("prediction_id", 1)])
-
-        # Blockchain database to support persistent log.
-        db.blockchain.create_index([("index", 1)], unique=True)
-
-        print("Indexes ensured for 'users', 'patients', 'predictions', and 'notes'.")
-    except Exception as e:
-        print("Error creating indexes:", e)
\ No newline at end of file
+    failures = []
+    for collection, keys, options in INDEXES:
+        try:
+            db[collection].create_index(keys, **options)
+        except Exception as e:
+            print(f"Error creating index {keys} on '{collection}':", e)
+            failures.append((collection, keys, e))
+
+    print(f"Indexes ensured: {len(INDEXES) - len(failures)} ok, {len(failures)} failed.")
+    return failures
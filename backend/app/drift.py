@@ -0,0 +1,250 @@
+import atexit
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from app.database import db
+
+# Input/output drift monitoring for /api/predict without rescanning predictions.
+# Each worker keeps one fixed-size sketch per hourly window (feature sums and
+# sums of squares, a one-year age histogram, a 20-bin probability histogram)
+# and flushes it every DRIFT_FLUSH_SECONDS as $inc upserts into
+# db.drift_windows, so sketches from all workers add up. /api/drift compares
+# recent windows with the profile stored in db.drift_reference.
+DRIFT_MONITORING = os.getenv("DRIFT_MONITORING", "1") == "1"
+DRIFT_FLUSH_SECONDS = float(os.getenv("DRIFT_FLUSH_SECONDS", "60"))
+AGE_BINS = 121          # 0..120 years, clamped
+PROBA_BINS = 20
+AGE_PSI_BIN_YEARS = 10  # age histogram is coarsened to decades for PSI
+CONTINUOUS_FEATURES = ("Age", "Age_Squared", "Disease_Frequency", "Risk_Score")
+REFERENCE_ID = "current"
+PSI_MODERATE, PSI_SIGNIFICANT = 0.1, 0.2
+
+
+def window_start(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+class DriftSketch:
+    """Summary of one window; its size depends only on the feature count."""
+
+    def __init__(self, feature_order: List[str]):
+        self.feature_order = list(feature_order)
+        self.age_idx = self.feature_order.index("Age")
+        self.count = 0
+        self.sum = [0.0] * len(feature_order)
+        self.sumsq = [0.0] * len(feature_order)
+        self.age = [0] * AGE_BINS
+        self.proba = [0] * PROBA_BINS
+
+    def add(self, vector, probability: float) -> None:
+        self.count += 1
+        for i, v in enumerate(vector):
+            self.sum[i] += v
+            self.sumsq[i] += v * v
+        self.age[min(max(int(vector[self.age_idx]), 0), AGE_BINS - 1)] += 1
+        self.proba[min(int(probability * PROBA_BINS), PROBA_BINS - 1)] += 1
+
+    def to_doc(self) -> Dict[str, Any]:
+        """Nested form used for windows and the reference profile (histograms are sparse)."""
+        return {
+            "count": self.count,
+            "sum": dict(zip(self.feature_order, self.sum)),
+            "sumsq": dict(zip(self.feature_order, self.sumsq)),
+            "age": {str(i): n for i, n in enumerate(self.age) if n},
+            "proba": {str(i): n for i, n in enumerate(self.proba) if n},
+        }
+
+    def to_inc(self) -> Dict[str, float]:
+        doc = self.to_doc()
+        inc = {"count": self.count}
+        for section in ("sum", "sumsq", "age", "proba"):
+            for key, value in doc[section].items():
+                inc[f"{section}.{key}"] = value
+        return inc
+
+
+class DriftMonitor:
+    def __init__(self):
+        self._windows: Dict[datetime, DriftSketch] = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def record(self, feature_order: List[str], vector, probability: float) -> None:
+        """Called from predict(); in-memory only."""
+        self._ensure_flusher()
+        start = window_start(datetime.utcnow())
+        with self._lock:
+            sketch = self._windows.get(start)
+            if sketch is None:
+                sketch = self._windows[start] = DriftSketch(feature_order)
+            sketch.add(vector, probability)
+
+    def flush(self) -> None:
+        with self._lock:
+            windows, self._windows = self._windows, {}
+        if not windows:
+            return
+        ops = [UpdateOne(
+            {"_id": f"{start:%Y-%m-%dT%H}"},
+            {"$setOnInsert": {"window_start": start}, "$inc": sketch.to_inc()},
+            upsert=True,
+        ) for start, sketch in windows.items()]
+        try:
+            db.drift_windows.bulk_write(ops, ordered=False)
+        except Exception as e:
+            print("Drift sketch flush failed:", e)
+
+    def _ensure_flusher(self):
+        if self._flusher is None:
+            with self._lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, name="drift-flush", daemon=True)
+                    self._flusher.start()
+                    atexit.register(self.flush)
+
+    def _flush_loop(self):
+        stop = threading.Event()
+        while not stop.wait(DRIFT_FLUSH_SECONDS):
+            self.flush()
+
+
+monitor = DriftMonitor()
+
+def record_drift(feature_order: List[str], vector, probability: float) -> None:
+    if DRIFT_MONITORING:
+        monitor.record(feature_order, vector, probability)
+
+
+# --------- Comparing with the reference profile ---------
+
+def merge_docs(docs) -> Dict[str, Any]:
+    """Add up window documents (same shape as DriftSketch.to_doc())."""
+    total = {"count": 0, "sum": {}, "sumsq": {}, "age": {}, "proba": {}}
+    for doc in docs:
+        total["count"] += doc.get("count", 0)
+        for section in ("sum", "sumsq", "age", "proba"):
+            for key, value in (doc.get(section) or {}).items():
+                total[section][key] = total[section].get(key, 0) + value
+    return total
+
+def _hist(sparse: Dict[str, float], bins: int) -> List[float]:
+    out = [0.0] * bins
+    for key, n in sparse.items():
+        out[int(key)] += n
+    return out
+
+def _proportions(counts: List[float]) -> List[float]:
+    total = sum(counts)
+    return [c / total for c in counts] if total else counts
+
+def psi(reference: List[float], current: List[float], eps: float = 1e-4) -> float:
+    """Population stability index between two histograms over the same bins."""
+    value = 0.0
+    for r, c in zip(_proportions(reference), _proportions(current)):
+        r, c = max(r, eps), max(c, eps)
+        value += (c - r) * math.log(c / r)
+    return value
+
+def ks(reference: List[float], current: List[float]) -> float:
+    """Kolmogorov-Smirnov statistic (max CDF gap) between two histograms."""
+    gap = cr = cc = 0.0
+    for r, c in zip(_proportions(reference), _proportions(current)):
+        cr, cc = cr + r, cc + c
+        gap = max(gap, abs(cr - cc))
+    return gap
+
+def quantiles(counts: List[float], qs=(0.1, 0.5, 0.9)) -> Dict[str, Optional[int]]:
+    """Bin index holding each quantile (for the age histogram: the age in years)."""
+    total = sum(counts)
+    out = {}
+    for q in qs:
+        out[f"p{int(q * 100)}"] = None
+        running = 0.0
+        for i, n in enumerate(counts):
+            running += n
+            if total and running >= q * total:
+                out[f"p{int(q * 100)}"] = i
+                break
+    return out
+
+def _status(value: float) -> str:
+    if value >= PSI_SIGNIFICANT:
+        return "significant"
+    return "moderate" if value >= PSI_MODERATE else "stable"
+
+def _mean_std(doc, feature):
+    n = doc["count"]
+    mean = doc["sum"].get(feature, 0) / n
+    var = max(doc["sumsq"].get(feature, 0) / n - mean * mean, 0.0)
+    return mean, math.sqrt(var)
+
+def compare(reference: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Drift statistics of `current` against `reference` (both merge_docs()-shaped)."""
+    ref_age, cur_age = _hist(reference["age"], AGE_BINS), _hist(current["age"], AGE_BINS)
+    decades = lambda h: [sum(h[i:i + AGE_PSI_BIN_YEARS]) for i in range(0, AGE_BINS, AGE_PSI_BIN_YEARS)]
+    ref_p, cur_p = _hist(reference["proba"], PROBA_BINS), _hist(current["proba"], PROBA_BINS)
+
+    features = {}
+    for feature in reference["sum"]:
+        ref_mean, ref_std = _mean_std(reference, feature)
+        cur_mean, cur_std = _mean_std(current, feature)
+        stats = {"reference_mean": ref_mean, "current_mean": cur_mean}
+        if feature in CONTINUOUS_FEATURES:
+            stats.update(reference_std=ref_std, current_std=cur_std,
+                         mean_shift_sd=(cur_mean - ref_mean) / ref_std if ref_std else None)
+        else:
+            # one-hot feature: the mean is the rate of 1s
+            value = psi([1 - ref_mean, ref_mean], [1 - cur_mean, cur_mean])
+            stats.update(psi=value, status=_status(value))
+        features[feature] = stats
+
+    age_psi = psi(decades(ref_age), decades(cur_age))
+    proba_psi = psi(ref_p, cur_p)
+    return {
+        "count": current["count"],
+        "reference_count": reference["count"],
+        "age": {
+            "psi": age_psi, "status": _status(age_psi), "ks": ks(ref_age, cur_age),
+            "reference_quantiles": quantiles(ref_age), "current_quantiles": quantiles(cur_age),
+        },
+        "probability": {
+            "psi": proba_psi, "status": _status(proba_psi), "ks": ks(ref_p, cur_p),
+            "reference_histogram": ref_p, "current_histogram": cur_p,
+        },
+        "features": features,
+    }
+
+def get_reference() -> Optional[Dict[str, Any]]:
+    return db.drift_reference.find_one({"_id": REFERENCE_ID})
+
+def load_windows(start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    return list(db.drift_windows.find({"window_start": {"$gte": start, "$lt": end}}).sort("window_start", 1))
+
+def drift_report(hours: int) -> Optional[Dict[str, Any]]:
+    """Compare the last `hours` hourly windows with the reference, or None if there is no reference."""
+    reference = get_reference()
+    if reference is None:
+        return None
+    end = datetime.utcnow()
+    windows = load_windows(window_start(end) - timedelta(hours=hours - 1), end)
+    current = merge_docs(windows)
+    report = {
+        "from": windows[0]["window_start"] if windows else None,
+        "to": end,
+        "reference": {k: reference.get(k) for k in ("source", "built_at", "model_version")},
+    }
+    if not current["count"]:
+        report["count"] = 0
+        return report
+    report.update(compare(merge_docs([reference]), current))
+    report["windows"] = [{
+        "window_start": w["window_start"],
+        "count": w.get("count", 0),
+        "probability_psi": psi(report["probability"]["reference_histogram"],
+                               _hist(w.get("proba") or {}, PROBA_BINS)),
+    } for w in windows]
+    return report
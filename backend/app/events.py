@@ -0,0 +1,88 @@
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Set
+
+from app.database import db
+
+# Per-user change events for the SSE stream (/events/stream).
+#
+# EVENTS_SOURCE=local (default): publish() fans out to subscribers in this
+#   process only -- fine for a single worker.
+# EVENTS_SOURCE=changestream: publish() inserts into db.events and every worker
+#   tails that collection with a MongoDB change stream (replica set required),
+#   so a user connected to worker A sees changes made on worker B.
+EVENTS_SOURCE = os.getenv("EVENTS_SOURCE", "local")
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers: Dict[str, Set[queue.Queue]] = {}
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, email: str) -> queue.Queue:
+        if EVENTS_SOURCE == "changestream":
+            self._ensure_listener()
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(email, set()).add(q)
+        return q
+
+    def unsubscribe(self, email: str, q: queue.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(email)
+            if subs:
+                subs.discard(q)
+                if not subs:
+                    del self._subscribers[email]
+
+    def deliver(self, recipients: Iterable[str], event: dict) -> None:
+        """Hand an event to local subscribers. Never blocks the publisher."""
+        with self._lock:
+            targets = [q for email in set(recipients) for q in self._subscribers.get(email, ())]
+        for q in targets:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # slow client: drop its backlog and tell it to refetch once
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait({"type": "resync", "data": {}})
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._watch_events, name="events-changestream", daemon=True)
+                self._listener.start()
+
+    def _watch_events(self):
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                with db.events.watch(pipeline) as stream:
+                    for change in stream:
+                        doc = change["fullDocument"]
+                        self.deliver(doc["recipients"], {"type": doc["type"], "data": doc["data"]})
+            except Exception as e:
+                print("Event change stream error, reconnecting:", e)
+                threading.Event().wait(2)
+
+
+broker = EventBroker()
+
+def publish(event_type: str, recipients: Iterable[str], data: dict) -> None:
+    """
+    Notify users (by email) that something they can see changed.
+    event_type e.g. "appointment.created", "note.deleted".
+    """
+    recipients = [r for r in recipients if r]
+    if not recipients:
+        return
+    if EVENTS_SOURCE == "changestream":
+        db.events.insert_one({"type": event_type, "recipients": recipients, "data": data,
+                              "created_at": datetime.utcnow()})
+    else:
+        broker.deliver(recipients, {"type": event_type, "data": data})
@@ -1,23 +1,39 @@
 from flask import Flask
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from app.routes.auth_routes import auth_bp
-from app.routes.patient_routes import patient_bp
-from app.routes.doctor_routes import doctor_bp
-from app.routes.prediction_routes import prediction_bp
-from app.database import init_indexes
 from dotenv import load_dotenv
-from app.routes.disease_routes import disease_bp
-from app.routes.appointment_routes import appointment_bp
-from app.routes.blockchain_routes import blockchain_bp
+from app.utils.startup_profile import StartupProfiler
+from app.metrics import init_request_metrics
+from app.utils.json_provider import OrjsonProvider
+from app.utils.http_cache import init_compression
+import importlib
+import sys
 import os
 
 
 load_dotenv()
 
-def create_app():
+# (module, blueprint attribute, url_prefix) -- imported inside create_app so
+# startup profiling can time each route module separately.
+BLUEPRINTS = [
+    ("app.routes.auth_routes", "auth_bp", "/auth"),
+    ("app.routes.patient_routes", "patient_bp", "/patients"),
+    ("app.routes.doctor_routes", "doctor_bp", "/doctors"),
+    ("app.routes.prediction_routes", "prediction_bp", "/api"),
+    ("app.routes.disease_routes", "disease_bp", "/catalog"),
+    ("app.routes.appointment_routes", "appointment_bp", "/appointments"),
+    ("app.routes.blockchain_routes", "blockchain_bp", None),
+    ("app.routes.metrics_routes", "metrics_bp", None),
+    ("app.routes.event_routes", "events_bp", "/events"),
+]
+
+def create_app(profiler=None):
+    profiler = profiler or StartupProfiler(enabled=False)
+
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET")
+    app.config["JWT_QUERY_STRING_NAME"] = "token"  # only used by routes that opt in (SSE)
     CORS(
         app,
         resources={r"/*": {"origins": [
@@ -26,24 +42,27 @@ def create_app():
         ]}},
         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         allow_headers=["Content-Type", "Authorization"],
-        expose_headers=["Content-Type"],
+        expose_headers=["Content-Type", "ETag", "Retry-After"],
         supports_credentials=False,  # True only if use cookies
         max_age=3600,
     )
 
     JWTManager(app)
+    init_request_metrics(app)
+    init_compression(app)
 
     # Register Blueprints (route groups)
-    app.register_blueprint(auth_bp, url_prefix="/auth")
-    app.register_blueprint(patient_bp, url_prefix="/patients")
-    app.register_blueprint(doctor_bp, url_prefix="/doctors")
-    app.register_blueprint(prediction_bp, url_prefix="/api")
-    app.register_blueprint(disease_bp, url_prefix="/catalog")
-    app.register_blueprint(appointment_bp, url_prefix="/appointments")
-    app.register_blueprint(blockchain_bp)
+    for module_name, bp_name, url_prefix in BLUEPRINTS:
+        with profiler.stage(f"import {module_name}"):
+            module = importlib.import_module(module_name)
+        blueprint = getattr(module, bp_name)
+        if url_prefix:
+            app.register_blueprint(blueprint, url_prefix=url_prefix)
+        else:
+            app.register_blueprint(blueprint)
 
-    # Create MongoDB indexes on startup
-    init_indexes()
+    # MongoDB, the blockchain ledger and the model are all initialized lazily
+    # on first use. Indexes are created by `python -m app.scripts.init_indexes`.
 
     @app.route("/")
     def home():
@@ -51,7 +70,30 @@ def create_app():
 
     return app
 
+def profile_startup():
+    """
+    Time app creation (per route-module import) plus each lazy initializer,
+    i.e. the cost the first requests would otherwise pay.
+    """
+    profiler = StartupProfiler()
+    create_app(profiler)
+
+    from app.database import get_client
+    from app.blockchain import blockchain
+    from app.routes.prediction_routes import get_model
+
+    with profiler.stage("init mongo client (ping)"):
+        get_client().admin.command("ping")
+    with profiler.stage("init blockchain ledger"):
+        blockchain.chain
+    with profiler.stage("init model"):
+        get_model()
+
+    print(profiler.report())
+
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        profile_startup()
+        sys.exit(0)
     app = create_app()
     app.run(debug=True, host="0.0.0.0") #Binding to 0.0.0.0 exposes the server to the host network so the browser (and Vite proxy) can reach it.
-
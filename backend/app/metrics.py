@@ -0,0 +1,171 @@
+"""
+In-process latency metrics rendered in the Prometheus text format at /metrics.
+
+Recording is a bisect plus a few integer adds under a per-histogram lock, so it
+is cheap enough to sit on every request and every Mongo command. Each worker
+process keeps its own numbers; Prometheus should scrape every worker.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    A labelled Prometheus histogram. Buckets are stored non-cumulatively and
+    only summed up when rendered.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+        for labels, counts, total, count in snapshot:
+            base = [f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels)]
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = ",".join(base + ['le="%s"' % le])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = "{" + ",".join(base) + "}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Histogram] = []
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        h = Histogram(*args, **kwargs)
+        self._metrics.append(h)
+        return h
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Flask request latency.",
+    ("blueprint", "route", "method", "status"),
+)
+MONGO_COMMAND_SECONDS = REGISTRY.histogram(
+    "mongo_command_duration_seconds", "MongoDB command duration (pymongo command monitoring).",
+    ("collection", "operation", "outcome"),
+)
+MODEL_PREDICT_SECONDS = REGISTRY.histogram(
+    "model_predict_proba_seconds", "Time spent in model.predict_proba.",
+)
+LEDGER_HASH_SECONDS = REGISTRY.histogram(
+    "ledger_hash_seconds", "Time spent hashing a new ledger block.",
+)
+LEDGER_APPEND_SECONDS = REGISTRY.histogram(
+    "ledger_append_seconds", "Time spent appending (hash + persist) a ledger block.",
+)
+SHADOW_PREDICT_SECONDS = REGISTRY.histogram(
+    "shadow_predict_proba_seconds", "Time the shadow (candidate) model spent scoring one batch.",
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, *labels: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, *labels)
+
+
+# --------- Flask request timing ---------
+
+def init_request_metrics(app) -> None:
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _remember_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    # teardown runs even when the view raised and after_request was skipped
+    @app.teardown_request
+    def _record_latency(exc=None):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            status = g.pop("_metrics_status", None)
+            if status is None or exc is not None:
+                status = 500
+            rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                request.blueprint or "app", rule, request.method, str(status),
+            )
+
+
+# --------- pymongo command monitoring ---------
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Times every command sent by the client. The collection name is only on
+    the started event, so it is remembered until the command completes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple, Tuple[str, str]] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            target = event.command.get("collection", "")  # getMore carries a cursor id instead
+        self._inflight[(event.connection_id, event.request_id)] = (str(target or "-"), event.command_name)
+
+    def _finish(self, event, outcome):
+        tags = self._inflight.pop((event.connection_id, event.request_id), None)
+        if tags is None:
+            tags = ("-", event.command_name)
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1_000_000, tags[0], tags[1], outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import bson
+from bson import ObjectId
+from app.database import db
+
+# Raw input keys that predict() used to store next to the model features.
+# They are exact copies of one-hot model features, so they are rebuilt on read.
+DERIVED_FEATURES = {
+    "fever": "Fever_Yes",
+    "cough": "Cough_Yes",
+    "fatigue": "Fatigue_Yes",
+    "difficulty_breathing": "Difficulty Breathing_Yes",
+}
+
+# model version recorded for predictions migrated from the old schema
+LEGACY_MODEL_VERSION = "unknown"
+
+# Where archive files live when predictions are archived with --storage file
+# (see scripts/archive_predictions.py); archive documents store paths relative to it.
+PREDICTION_ARCHIVE_DIR = os.getenv("PREDICTION_ARCHIVE_DIR", "archives")
+ARCHIVE_CACHE_SIZE = 32
+
+_known_schemas: Dict[str, Dict[str, Any]] = {}
+
+
+class PredictionDataError(Exception):
+    """A stored prediction can't be expanded (e.g. its feature schema document is missing)."""
+
+
+def schema_id_for(feature_order: List[str], model_version: str) -> str:
+    raw = json.dumps({"feature_order": feature_order, "model_version": model_version})
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def ensure_schema(feature_order: List[str], model_version: str) -> str:
+    """
+    Store the feature-schema/model-version document once and return its id.
+    Each process only talks to Mongo the first time it sees a schema.
+    """
+    schema_id = schema_id_for(feature_order, model_version)
+    if schema_id not in _known_schemas:
+        schema = {
+            "_id": schema_id,
+            "feature_order": list(feature_order),
+            "model_version": model_version,
+            "derived": {k: v for k, v in DERIVED_FEATURES.items() if v in feature_order},
+        }
+        db.feature_schemas.update_one({"_id": schema_id}, {"$setOnInsert": schema}, upsert=True)
+        _known_schemas[schema_id] = schema
+    return schema_id
+
+def get_schema(schema_id: str) -> Optional[Dict[str, Any]]:
+    schema = _known_schemas.get(schema_id)
+    if schema is None:
+        schema = db.feature_schemas.find_one({"_id": schema_id})
+        if schema:
+            _known_schemas[schema_id] = schema
+    return schema
+
+def compact_prediction_doc(patient_email, vector, feature_order, model_version, result, created_at):
+    """
+    Compact prediction document: the numeric vector in schema order plus a
+    reference to the schema document, instead of a features dict with
+    repeated key names and a copy of the feature order.
+    """
+    return {
+        "patient_email": patient_email,
+        "schema_id": ensure_schema(feature_order, model_version),
+        "x": list(vector),
+        "result": result,
+        "created_at": created_at,
+    }
+
+def expand_prediction(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Return `doc` in the original shape (`features` dict + `feature_order`).
+    Documents already in the old shape are returned untouched.
+    Raises PredictionDataError if the referenced schema is missing.
+    """
+    if not doc or "x" not in doc:
+        return doc
+    schema = get_schema(doc.get("schema_id"))
+    if schema is None:
+        message = f"Prediction {doc.get('_id')} references missing feature schema {doc.get('schema_id')}"
+        print(message)
+        raise PredictionDataError(message)
+    order = schema["feature_order"]
+    features = dict(zip(order, doc.pop("x")))
+    for raw_key, feature in schema.get("derived", {}).items():
+        features[raw_key] = features[feature]
+    doc["features"] = features
+    doc["feature_order"] = order
+    doc["model_version"] = schema["model_version"]
+    return doc
+
+# --------- Archived predictions ---------
+# Old predictions are moved into one compressed document (or file) per
+# (patient, month) in db.prediction_archives. db.prediction_stubs keeps
+# {_id: prediction id, patient_email, archive_id} so ids referenced from
+# ledger blocks and notes still resolve.
+
+def archive_id_for(patient_email: str, created_at) -> str:
+    return f"{patient_email}|{created_at.strftime('%Y-%m')}"
+
+def encode_archive(docs: List[Dict[str, Any]]) -> bytes:
+    return zlib.compress(bson.encode({"docs": docs}), 9)
+
+def decode_archive(data: bytes) -> List[Dict[str, Any]]:
+    return bson.decode(zlib.decompress(data))["docs"]
+
+def read_archive(archive: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Compact prediction documents held by an archive document (inline or in a file)."""
+    if archive.get("storage") == "file":
+        with open(os.path.join(PREDICTION_ARCHIVE_DIR, archive["file"]), "rb") as f:
+            return decode_archive(f.read())
+    return decode_archive(archive["data"])
+
+_archive_cache: "OrderedDict[str, Dict[ObjectId, Dict[str, Any]]]" = OrderedDict()
+_archive_cache_lock = threading.Lock()
+
+def _archived_docs(archive_id: str) -> Dict[ObjectId, Dict[str, Any]]:
+    with _archive_cache_lock:
+        if archive_id in _archive_cache:
+            _archive_cache.move_to_end(archive_id)
+            return _archive_cache[archive_id]
+    archive = db.prediction_archives.find_one({"_id": archive_id})
+    docs = {d["_id"]: d for d in read_archive(archive)} if archive else {}
+    with _archive_cache_lock:
+        _archive_cache[archive_id] = docs
+        if len(_archive_cache) > ARCHIVE_CACHE_SIZE:
+            _archive_cache.popitem(last=False)
+    return docs
+
+def _load_archived(prediction_ids: List[ObjectId], filters) -> Dict[ObjectId, Dict[str, Any]]:
+    found = {}
+    for stub in db.prediction_stubs.find({"_id": {"$in": list(prediction_ids)}, **filters}):
+        doc = _archived_docs(stub["archive_id"]).get(stub["_id"])
+        if doc:
+            found[stub["_id"]] = expand_prediction({**doc, "archived": True})
+    return found
+
+
+def load_prediction(prediction_id: ObjectId, **filters) -> Optional[Dict[str, Any]]:
+    """
+    Fetch one prediction by id (plus optional filters) in expanded form.
+    Filters may only use fields kept on stubs (patient_email).
+    """
+    doc = db.predictions.find_one({"_id": prediction_id, **filters})
+    if doc is None:
+        return _load_archived([prediction_id], filters).get(prediction_id)
+    return expand_prediction(doc)
+
+def load_predictions(prediction_ids: List[ObjectId], **filters) -> Dict[ObjectId, Dict[str, Any]]:
+    """Fetch many predictions in one query (plus one for archived ones), expanded, keyed by _id."""
+    cursor = db.predictions.find({"_id": {"$in": list(prediction_ids)}, **filters})
+    found = {doc["_id"]: expand_prediction(doc) for doc in cursor}
+    missing = [pid for pid in prediction_ids if pid not in found]
+    if missing:
+        found.update(_load_archived(missing, filters))
+    return found
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from pymongo import UpdateOne
+from app.database import db
+
+# Per-patient probability rollups, kept up to date by predict() so trend
+# charts read O(buckets) documents instead of every raw prediction.
+GRANULARITIES = ("day", "week")
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    """Start of the UTC day, or of the ISO week (Monday), containing `ts`."""
+    day = datetime(ts.year, ts.month, ts.day)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+def _rollup_id(patient_email: str, granularity: str, start: datetime) -> str:
+    return f"{patient_email}|{granularity}|{start:%Y-%m-%d}"
+
+def record_prediction(patient_email: str, probability: float, created_at: datetime) -> None:
+    """Fold one prediction into the patient's day and week buckets (single round trip)."""
+    ops = []
+    for granularity in GRANULARITIES:
+        start = bucket_start(created_at, granularity)
+        ops.append(UpdateOne(
+            {"_id": _rollup_id(patient_email, granularity, start)},
+            {
+                "$setOnInsert": {"patient_email": patient_email, "granularity": granularity, "bucket_start": start},
+                "$inc": {"count": 1, "sum": probability},
+                "$min": {"min": probability},
+                "$max": {"max": probability},
+                "$set": {"last": probability, "last_at": created_at},
+            },
+            upsert=True,
+        ))
+    db.prediction_rollups.bulk_write(ops, ordered=False)
+
+def get_trend(patient_email: str, granularity: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """Buckets with bucket_start in [start, end), oldest first."""
+    cursor = db.prediction_rollups.find(
+        {
+            "patient_email": patient_email,
+            "granularity": granularity,
+            "bucket_start": {"$gte": bucket_start(start, granularity), "$lt": end},
+        },
+        {"_id": 0, "bucket_start": 1, "count": 1, "sum": 1, "min": 1, "max": 1, "last": 1},
+    ).sort("bucket_start", 1)
+
+    buckets = []
+    for doc in cursor:
+        count = doc["count"]
+        buckets.append({
+            "bucket_start": doc["bucket_start"],
+            "count": count,
+            "mean": doc["sum"] / count if count else None,
+            "min": doc["min"],
+            "max": doc["max"],
+            "last": doc["last"],
+        })
+    return buckets
@@ -1,18 +1,38 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from app.database import db
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from bson import ObjectId
+from app.utils.http_cache import conditional_get, get_version, bump_version, scope_key
+from app.events import publish
+from app.scheduling import (
+    SLOT_MINUTES, DEFAULT_DURATION_MINUTES, MAX_DURATION_MINUTES,
+    parse_utc, as_utc, claim_slots, release_slots, parse_windows, get_windows,
+    within_availability, invalidate_interval_index, free_slots,
+)
 
 appointment_bp = Blueprint("appointments", __name__)
 
 def _now(): return datetime.now(timezone.utc).isoformat()
 
-def _serialize_appt(doc):
-    if not doc:
-        return None
-    doc["_id"] = str(doc["_id"])
-    return doc
+def _incoming_query():
+    q = {"doctor_email": get_jwt_identity()}
+    status = request.args.get("status")
+    if status in {"pending", "accepted", "rejected"}:
+        q["status"] = status
+    return q
+
+# Per-user list versions, bumped after every appointment write (see _bump_lists)
+def _mine_version():
+    return get_version(scope_key("appointments", "patient_email", get_jwt_identity()))
+
+def _incoming_version():
+    # covers every ?status= filter of this doctor's list
+    return get_version(scope_key("appointments", "doctor_email", get_jwt_identity()))
+
+def _bump_lists(patient_email, doctor_email):
+    bump_version(scope_key("appointments", "patient_email", patient_email),
+                 scope_key("appointments", "doctor_email", doctor_email))
 
 # -------------------------
 # PATIENT: create request
@@ -33,17 +53,47 @@ def create_appointment():
     if not doctor_email or not requested_time:
         return jsonify({"error": "doctor_email and requested_time are required"}), 400
 
+    try:
+        start = parse_utc(requested_time)
+        duration = int(body.get("duration_minutes") or DEFAULT_DURATION_MINUTES)
+    except (ValueError, TypeError):
+        return jsonify({"error": "requested_time must be ISO 8601 and duration_minutes an integer"}), 400
+    if start.minute % SLOT_MINUTES or start.second or start.microsecond:
+        return jsonify({"error": f"requested_time must be on a {SLOT_MINUTES}-minute boundary"}), 400
+    if duration <= 0 or duration % SLOT_MINUTES or duration > MAX_DURATION_MINUTES:
+        return jsonify({"error": f"duration_minutes must be a multiple of {SLOT_MINUTES} up to {MAX_DURATION_MINUTES}"}), 400
+    end = start + timedelta(minutes=duration)
+    if start <= datetime.now(timezone.utc):
+        return jsonify({"error": "requested_time must be in the future"}), 400
+    if not within_availability(get_windows(doctor_email), start, end):
+        return jsonify({"error": "Requested time is outside the doctor's availability"}), 409
+
+    # Claim the time slots first: this is the atomic step that rejects overlaps
+    appointment_id = ObjectId()
+    if not claim_slots(doctor_email, start, end, appointment_id):
+        return jsonify({"error": "Doctor is already booked at that time"}), 409
+
     doc = {
+        "_id": appointment_id,
         "patient_email": patient_email,
         "doctor_email": doctor_email,
-        "requested_time": requested_time, # frontend sends ISO (YYYY-MM-DD)?
+        "requested_time": requested_time, # original string, kept for the frontend
+        "start_at": start,  # parsed UTC interval, used for conflict checks
+        "end_at": end,
         "reason": reason or None,
         "status": "pending", # pending | accepted | rejected
         "created_at": _now(),
         "updated_at": _now(),
     }
-    ins = db.appointments.insert_one(doc)
-    return jsonify({"message": "Appointment requested", "appointment_id": str(ins.inserted_id)}), 201
+    try:
+        db.appointments.insert_one(doc)
+    except Exception:
+        release_slots(appointment_id)
+        raise
+    invalidate_interval_index(doctor_email)
+    _bump_lists(patient_email, doctor_email)
+    publish("appointment.created", [patient_email, doctor_email], doc)
+    return jsonify({"message": "Appointment requested", "appointment_id": str(appointment_id)}), 201
 
 
 # -------------------------
@@ -51,6 +101,7 @@ def create_appointment():
 # -------------------------
 @appointment_bp.get("/mine")
 @jwt_required()
+@conditional_get(_mine_version, role="patient")
 def my_appointments():
     claims = get_jwt()
     if claims.get("role") != "patient":
@@ -59,12 +110,12 @@ def my_appointments():
     email = get_jwt_identity()
     cursor = db.appointments.find(
         {"patient_email": email},
-        {"patient_email": 1, "doctor_email": 1, "requested_time": 1,
+        {"patient_email": 1, "doctor_email": 1, "requested_time": 1, "start_at": 1, "end_at": 1,
          "reason": 1, "status": 1, "created_at": 1, "updated_at": 1}
     ).sort("created_at", -1)
 
-    items = [_serialize_appt(d) for d in cursor]
-    return jsonify({"items": items})
+    # cursor is drained (and _id stringified) by the app's JSON provider
+    return jsonify({"items": cursor})
 
 
 # -------------------------
@@ -72,25 +123,21 @@ def my_appointments():
 # -------------------------
 @appointment_bp.get("/incoming")
 @jwt_required()
+@conditional_get(_incoming_version, role="doctor")
 def incoming_appointments():
     claims = get_jwt()
     if claims.get("role") != "doctor":
         return jsonify({"error": "Access denied"}), 403
 
-    email = get_jwt_identity()
-    status = request.args.get("status")
-    q = {"doctor_email": email}
-    if status in {"pending", "accepted", "rejected"}:
-        q["status"] = status
-
+    q = _incoming_query()
     cursor = db.appointments.find(
         q,
-        {"patient_email": 1, "doctor_email": 1, "requested_time": 1,
+        {"patient_email": 1, "doctor_email": 1, "requested_time": 1, "start_at": 1, "end_at": 1,
          "reason": 1, "status": 1, "created_at": 1, "updated_at": 1}
     ).sort("created_at", -1)
 
-    items = [_serialize_appt(d) for d in cursor]
-    return jsonify({"items": items})
+    # cursor is drained (and _id stringified) by the app's JSON provider
+    return jsonify({"items": cursor})
 
 # -------------------------
 # DOCTOR: accept / reject
@@ -113,11 +160,86 @@ def update_status(appointment_id):
     except Exception:
         return jsonify({"error": "invalid appointment id"}), 400
 
+    appt = db.appointments.find_one({"_id": _id, "doctor_email": email},
+                                    {"status": 1, "start_at": 1, "end_at": 1, "patient_email": 1})
+    if not appt:
+        return jsonify({"error": "Not found"}), 404
+
+    # Rejecting frees the slots; re-accepting a rejected request must claim them again.
+    if new_status == "accepted" and appt.get("status") == "rejected" and appt.get("start_at"):
+        if not claim_slots(email, as_utc(appt["start_at"]), as_utc(appt["end_at"]), _id):
+            return jsonify({"error": "That time has been booked by another appointment"}), 409
+
+    updated_at = _now()
     res = db.appointments.update_one(
         {"_id": _id, "doctor_email": email},
-        {"$set": {"status": new_status, "updated_at": _now()}}
+        {"$set": {"status": new_status, "updated_at": updated_at}}
     )
     if res.matched_count == 0:
         return jsonify({"error": "Not found"}), 404
 
-    return jsonify({"message": f"Appointment {new_status}"}), 200
\ No newline at end of file
+    if new_status == "rejected":
+        release_slots(_id)
+    invalidate_interval_index(email)
+    _bump_lists(appt.get("patient_email"), email)
+    publish("appointment.updated", [appt.get("patient_email"), email],
+            {"_id": _id, "status": new_status, "updated_at": updated_at})
+    return jsonify({"message": f"Appointment {new_status}"}), 200
+
+
+# -------------------------
+# DOCTOR: weekly availability
+# -------------------------
+@appointment_bp.put("/availability")
+@jwt_required()
+def set_availability():
+    """
+    Body: {"windows": [{"weekday": 0, "start": "09:00", "end": "17:00"}, ...]}
+    weekday 0 = Monday; times are UTC. An empty list means "no restriction".
+    """
+    claims = get_jwt()
+    if claims.get("role") != "doctor":
+        return jsonify({"error": "Access denied"}), 403
+
+    try:
+        windows = parse_windows((request.get_json() or {}).get("windows"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    email = get_jwt_identity()
+    db.doctor_availability.update_one(
+        {"_id": email},
+        {"$set": {"windows": windows, "updated_at": _now()}},
+        upsert=True,
+    )
+    return jsonify({"message": "Availability saved", "windows": windows}), 200
+
+@appointment_bp.get("/doctors/<doctor_email>/availability")
+@jwt_required()
+def doctor_availability(doctor_email):
+    return jsonify({"doctor_email": doctor_email, "windows": get_windows(doctor_email.strip().lower())})
+
+
+# -------------------------
+# ANY USER: free slots for a doctor
+# -------------------------
+@appointment_bp.get("/doctors/<doctor_email>/free-slots")
+@jwt_required()
+def doctor_free_slots(doctor_email):
+    """
+    ?from=<ISO>&to=<ISO> (max 31 days, default next 7 days)&slot_minutes=<default 60>
+    """
+    try:
+        start = parse_utc(request.args["from"]) if request.args.get("from") else datetime.now(timezone.utc)
+        end = parse_utc(request.args["to"]) if request.args.get("to") else start + timedelta(days=7)
+        slot_minutes = int(request.args.get("slot_minutes", DEFAULT_DURATION_MINUTES))
+    except ValueError:
+        return jsonify({"error": "from/to must be ISO 8601 and slot_minutes an integer"}), 400
+    if end <= start or end - start > timedelta(days=31):
+        return jsonify({"error": "to must be after from and within 31 days"}), 400
+    if slot_minutes <= 0 or slot_minutes % SLOT_MINUTES or slot_minutes > MAX_DURATION_MINUTES:
+        return jsonify({"error": f"slot_minutes must be a multiple of {SLOT_MINUTES} up to {MAX_DURATION_MINUTES}"}), 400
+
+    slots = free_slots(doctor_email.strip().lower(), start, end, slot_minutes)
+    return jsonify({"doctor_email": doctor_email, "slots": slots})
+
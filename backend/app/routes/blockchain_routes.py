@@ -1,10 +1,17 @@
 from flask import Blueprint, jsonify
 from app.blockchain import blockchain  # import the global instance
+from app.utils.http_cache import conditional_get
 
 blockchain_bp = Blueprint("blockchain", __name__, url_prefix="/blockchain")
 
 
+def _ledger_version():
+    # the tip hash changes on every append
+    return blockchain.get_latest_block().hash
+
+
 @blockchain_bp.get("/")
+@conditional_get(_ledger_version)
 def get_blockchain():
     """
     View the entire blockchain.
@@ -13,6 +20,7 @@ def get_blockchain():
 
 
 @blockchain_bp.get("/valid")
+@conditional_get(_ledger_version)
 def validate_blockchain():
     """
     Check if the chain is still valid (no tampering).
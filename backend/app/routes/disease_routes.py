@@ -1,9 +1,17 @@
 from flask import Blueprint, request, jsonify
 from app.database import db
+from app.utils.http_cache import conditional_get, get_version
 
 disease_bp = Blueprint("disease_catalog", __name__)
 
+# bumped by the seed/import scripts whenever the catalog changes
+CATALOG_VERSION_KEY = "disease_catalog"
+
+def _catalog_version(*args, **kwargs):
+    return get_version(CATALOG_VERSION_KEY)
+
 @disease_bp.get("/")
+@conditional_get(_catalog_version)
 def list_diseases():
     q = (request.args.get("q") or "").strip()
     page = int(request.args.get("page", 1))
@@ -23,6 +31,7 @@ def list_diseases():
     return jsonify({"items": items, "page": page, "limit": limit, "total": total})
 
 @disease_bp.get("/<code>")
+@conditional_get(_catalog_version)
 def get_disease(code):
     doc = db.diseases.find_one({"code": code}, {"_id": 0})
     if not doc:
@@ -3,6 +3,11 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime
 from bson import ObjectId
 from app.database import db
+from app.utils.http_cache import conditional_get, get_version, scope_key
+from app.routes.patient_routes import PROFILE_PROJECTION, bump_note_versions
+from app.events import publish
+from app.prediction_store import load_prediction, PredictionDataError
+from app.utils.note_search import search_notes, parse_search_args
 
 doctor_bp = Blueprint("doctors", __name__)
 
@@ -60,7 +65,11 @@ def add_note():
             prediction_id = ObjectId(prediction_id_str)
         except Exception:
             return jsonify({"error": "Invalid prediction_id"}), 400
-        if not db.predictions.find_one({"_id": prediction_id, "patient_email": patient_email}):
+        try:
+            found = load_prediction(prediction_id, patient_email=patient_email)  # includes archived ones
+        except PredictionDataError:
+            found = True  # it exists; only its feature schema is missing
+        if not found:
             return jsonify({"error": "Prediction not found for this patient"}), 404
 
     doc = {
@@ -72,12 +81,22 @@ def add_note():
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
     }
-    res = db.notes.insert_one(doc)
+    res = db.notes.insert_one(doc)  # sets doc["_id"]
+    bump_note_versions(patient_email, prediction_id)
+    publish("note.created", [doctor_email, patient_email if visible_to_patient else None], doc)
 
     return jsonify({"message": "Note added", "note_id": str(res.inserted_id)}), 201
 
+def _patient_notes_version(patient_email):
+    # one counter per patient also covers the ?prediction_id= filter
+    prediction_id_str = request.args.get("prediction_id")
+    if prediction_id_str and not ObjectId.is_valid(prediction_id_str):
+        return None
+    return get_version(scope_key("notes", "patient_email", patient_email))
+
 @doctor_bp.route("/patients/<patient_email>/notes", methods=["GET"])
 @jwt_required()
+@conditional_get(_patient_notes_version, role="doctor")
 def list_notes_for_patient(patient_email):
     """Doctor-only: list all notes for a patient. Optional ?prediction_id=..."""
     gate = _require_doctor()
@@ -91,15 +110,17 @@ def list_notes_for_patient(patient_email):
         except Exception:
             return jsonify({"error": "Invalid prediction_id"}), 400
 
-    notes = list(db.notes.find(query).sort("created_at", -1))
-    for n in notes:
-        n["_id"] = str(n["_id"])
-        if n.get("prediction_id"):
-            n["prediction_id"] = str(n["prediction_id"])
+    notes = db.notes.find(query).sort("created_at", -1)
     return jsonify({"notes": notes}), 200
 
+def _prediction_notes_version(prediction_id):
+    if not ObjectId.is_valid(prediction_id):
+        return None
+    return get_version(scope_key("notes", "prediction_id", prediction_id))
+
 @doctor_bp.route("/predictions/<prediction_id>/notes", methods=["GET"])
 @jwt_required()
+@conditional_get(_prediction_notes_version, role="doctor")
 def list_notes_for_prediction(prediction_id):
     """Doctor-only: list notes tied to a specific prediction."""
     gate = _require_doctor()
@@ -110,14 +131,31 @@ def list_notes_for_prediction(prediction_id):
     except Exception:
         return jsonify({"error": "Invalid prediction_id"}), 400
 
-    notes = list(db.notes.find({"prediction_id": pid}).sort("created_at", -1))
-    for n in notes:
-        n["_id"] = str(n["_id"])
-        if n.get("prediction_id"):
-            n["prediction_id"] = str(n["prediction_id"])
+    notes = db.notes.find({"prediction_id": pid}).sort("created_at", -1)
     return jsonify({"notes": notes}), 200
 
 
+@doctor_bp.route("/notes/search", methods=["GET"])
+@jwt_required()
+def search_my_notes():
+    """
+    Doctor-only: ranked full-text search over notes this doctor wrote.
+    ?q=wheezing&patient_email=<optional>&page=1&limit=20
+    Each note carries a `snippet` with matches wrapped in <mark>.
+    """
+    gate = _require_doctor()
+    if gate: return gate
+
+    scope = {"doctor_email": get_jwt_identity()}
+    if request.args.get("patient_email"):
+        scope["patient_email"] = request.args["patient_email"]
+    try:
+        q, page, limit = parse_search_args(request.args)
+        return jsonify(search_notes(scope, q, page, limit)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
 # delete a note
 @doctor_bp.route("/notes/<note_id>", methods=["DELETE"])
 @jwt_required() #Any attempt to access that route without a valid JWT in the request will be blocked
@@ -149,6 +187,11 @@ def delete_note(note_id):
 
     if result.deleted_count == 0:
         return jsonify({"error": "Failed to delete note"}), 500
+
+    bump_note_versions(note.get("patient_email"), note.get("prediction_id"))
+    publish("note.deleted",
+            [doctor_email, note.get("patient_email") if note.get("visible_to_patient") else None],
+            {"_id": note_object_id, "prediction_id": note.get("prediction_id")})
     
     return jsonify({
         "message": "Note deleted successfully",
@@ -173,7 +216,7 @@ def my_patients():
         return jsonify({"items": []})
 
     # Pull basic profile info from patients + names from users
-    profiles = {p.get("email"): p for p in db.patients.find({"email": {"$in": emails}}, {"_id": 0})}
+    profiles = {p.get("email"): p for p in db.patients.find({"email": {"$in": emails}}, {"_id": 0, "email": 1, "gender": 1, "age": 1})}
     users = {u.get("email"): u for u in db.users.find({"email": {"$in": emails}}, {"_id": 0, "password": 0})}
 
     items = []
@@ -208,7 +251,7 @@ def patient_profile_by_email():
     user = db.users.find_one({"email": target}, {"_id": 0, "password": 0})
     if not user:
         return jsonify({"error": "User not found"}), 404
-    profile = db.patients.find_one({"email": target}, {"_id": 0}) or {}
+    profile = db.patients.find_one({"email": target}, PROFILE_PROJECTION) or {}
 
     return jsonify({
         "user": user, # first_name, last_name, email, role
@@ -0,0 +1,40 @@
+import queue
+from flask import Blueprint, Response, current_app, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.events import broker
+
+events_bp = Blueprint("events", __name__)
+
+HEARTBEAT_SECONDS = 15
+
+
+@events_bp.get("/stream")
+@jwt_required(locations=["headers", "query_string"])  # EventSource can't send headers: ?token=<jwt>
+def stream():
+    """
+    Server-sent events for the logged-in user: appointment.created,
+    appointment.updated, note.created, note.deleted (and resync if the
+    client fell behind). Replaces polling the list endpoints.
+    """
+    email = get_jwt_identity()
+    q = broker.subscribe(email)
+    dumps = current_app.json.dumps
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = q.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {dumps(event['data'])}\n\n"
+        finally:
+            broker.unsubscribe(email, q)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,12 @@
+from flask import Blueprint, Response
+from app.metrics import REGISTRY
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.get("/metrics")
+def metrics():
+    """
+    Prometheus scrape endpoint (text exposition format).
+    """
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
@@ -1,10 +1,18 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from bson import ObjectId
+from pymongo import ReturnDocument
 from app.database import db
+from app.utils.http_cache import conditional_get, get_version, bump_version, scope_key
+from app.routes.prediction_routes import REQUIRED_PROFILE_FIELDS, precomputed_profile_fields
+from app.utils.note_search import search_notes, parse_search_args
 
 patient_bp = Blueprint("patients", __name__)
 
+# Derived fields kept on the profile for predict(); not part of the API response
+PROFILE_PROJECTION = {"_id": 0, "encoded_vector": 0, "encoding_version": 0, "last_prediction": 0,
+                      "profile_version": 0}
+
 # -------------------------------
 # Dashboard
 # -------------------------------
@@ -29,7 +37,7 @@ def get_profile():
         return jsonify({"error": "Access denied"}), 403
 
     email = get_jwt_identity()
-    profile = db.patients.find_one({"email": email}, {"_id": 0})
+    profile = db.patients.find_one({"email": email}, PROFILE_PROJECTION)
     if not profile:
         return jsonify({"message": "No profile found"}), 404
 
@@ -62,12 +70,37 @@ def update_profile():
     if not update_data:
         return jsonify({"error": "No valid fields provided"}), 400
 
+    # Validate now (not at predict time) once the profile is complete.
+    # Partial profiles are still saved, just without a stored vector.
+    stored = db.patients.find_one({"email": email}, {"_id": 0, **{k: 1 for k in allowed_fields}}) or {}
+    merged = {**stored, **update_data}
+    if all(k in merged for k in REQUIRED_PROFILE_FIELDS):
+        try:
+            precomputed_profile_fields(merged)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    # Save the raw fields and drop the old vector in one write (predict() encodes
+    # from the raw fields until the vector is back). The vector is then encoded from
+    # the post-update document and only stored if no other update landed meanwhile;
+    # a concurrent update does the same for its own version.
     # MongoDB will automatically create 'patients' collection if it doesn’t exist
-    db.patients.update_one(
+    saved = db.patients.find_one_and_update(
         {"email": email},
-        {"$set": {"email": email, **update_data}},
-        upsert=True  # create if not exists
+        {"$set": {"email": email, **update_data}, "$inc": {"profile_version": 1},
+         "$unset": {"encoded_vector": "", "encoding_version": ""}},
+        projection={"_id": 0, "profile_version": 1, **{k: 1 for k in allowed_fields}},
+        upsert=True,  # create if not exists
+        return_document=ReturnDocument.AFTER,
     )
+    if all(k in saved for k in REQUIRED_PROFILE_FIELDS):
+        try:
+            db.patients.update_one(
+                {"email": email, "profile_version": saved["profile_version"]},
+                {"$set": precomputed_profile_fields(saved)},
+            )
+        except ValueError:
+            pass  # left without a vector; predict() reports the validation error
 
     return jsonify({"message": "Profile saved successfully"}), 200
 
@@ -76,8 +109,30 @@ def update_profile():
 # Get Patient note list
 # -------------------------------
 
+def _my_notes_query():
+    """Query for the caller's visible notes, or None if ?prediction_id is malformed."""
+    q = {"patient_email": get_jwt_identity(), "visible_to_patient": True}
+    prediction_id_str = request.args.get("prediction_id")
+    if prediction_id_str:
+        if not ObjectId.is_valid(prediction_id_str):
+            return None
+        q["prediction_id"] = ObjectId(prediction_id_str)
+    return q
+
+def _my_notes_version():
+    q = _my_notes_query()
+    return get_version(scope_key("notes", "patient_email", q["patient_email"])) if q else None
+
+def bump_note_versions(patient_email, prediction_id=None):
+    """Call after any write to db.notes: invalidates the patient's and the prediction's note lists."""
+    names = [scope_key("notes", "patient_email", patient_email)]
+    if prediction_id:
+        names.append(scope_key("notes", "prediction_id", str(prediction_id)))
+    bump_version(*names)
+
 @patient_bp.route("/notes", methods=["GET"])
 @jwt_required()
+@conditional_get(_my_notes_version, role="patient")
 def my_notes():
     """
     Patient: view doctor notes about themselves that are visible_to_patient=True
@@ -87,24 +142,34 @@ def my_notes():
     if claims.get("role") != "patient":
         return jsonify({"error": "Access denied"}), 403
 
-    email = get_jwt_identity()
-    q = {"patient_email": email, "visible_to_patient": True}
+    q = _my_notes_query()
+    if q is None:
+        return jsonify({"error": "Invalid prediction_id"}), 400
 
-    prediction_id_str = request.args.get("prediction_id")
-    if prediction_id_str:
-        try:
-            q["prediction_id"] = ObjectId(prediction_id_str)
-        except Exception:
-            return jsonify({"error": "Invalid prediction_id"}), 400
-
-    notes = list(db.notes.find(q).sort("created_at", -1))
-    for n in notes:
-        n["_id"] = str(n["_id"])
-        if n.get("prediction_id"):
-            n["prediction_id"] = str(n["prediction_id"])
+    # ObjectIds/datetimes are encoded by the app's JSON provider; no per-note loop
+    notes = db.notes.find(q).sort("created_at", -1)
     return jsonify({"notes": notes}), 200
 
 
+@patient_bp.route("/notes/search", methods=["GET"])
+@jwt_required()
+def search_my_visible_notes():
+    """
+    Patient: ranked full-text search over their visible_to_patient=True notes.
+    ?q=wheezing&page=1&limit=20
+    """
+    claims = get_jwt()
+    if claims.get("role") != "patient":
+        return jsonify({"error": "Access denied"}), 403
+
+    scope = {"patient_email": get_jwt_identity(), "visible_to_patient": True}
+    try:
+        q, page, limit = parse_search_args(request.args)
+        return jsonify(search_notes(scope, q, page, limit)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
 # -------------------------------
 # Get a single note
 # -------------------------------
@@ -127,7 +192,4 @@ def my_single_note(note_id):
     if not note:
         return jsonify({"error": "Note not found"}), 404
 
-    note["_id"] = str(note["_id"])
-    if note.get("prediction_id"):
-        note["prediction_id"] = str(note["prediction_id"])
     return jsonify({"note": note}), 200
\ No newline at end of file
@@ -1,11 +1,21 @@
 # app/routes/prediction_routes.py
 import os
+import hashlib
+from bson import ObjectId
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.database import db
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.blockchain import blockchain
-from joblib import load
+from app.metrics import timed, MODEL_PREDICT_SECONDS, LEDGER_APPEND_SECONDS
+from app.prediction_store import (
+    compact_prediction_doc, load_prediction, load_predictions, DERIVED_FEATURES, PredictionDataError,
+)
+from app.explanations import explain_vectors
+from app.utils.rate_limit import limit_inference
+from app.rollups import GRANULARITIES, record_prediction, get_trend
+from app.shadow import shadow, shadow_summary
+from app.drift import record_drift, drift_report
 
 prediction_bp = Blueprint("prediction", __name__)
 
@@ -102,19 +112,49 @@ def _to_vector(encoded: dict):
     """Return a list in the FEATURE_ORDER ready for model.predict/predict_proba."""
     return [encoded[k] for k in FEATURE_ORDER]
 
+# Profile fields _encode_input cannot do without
+REQUIRED_PROFILE_FIELDS = ["fever", "cough", "fatigue", "difficulty_breathing",
+                           "blood_pressure", "cholesterol_level", "age"]
+
+# Identifies the encoding a stored vector was produced with.
+# Bump the suffix whenever _encode_input changes so stale vectors are ignored.
+ENCODING_VERSION = hashlib.sha1("|".join(FEATURE_ORDER).encode("utf-8")).hexdigest()[:12] + "-1"
+
+def precomputed_profile_fields(profile: dict) -> dict:
+    """
+    Fields stored next to a complete profile so predict() can skip encoding.
+    Raises ValueError (same messages as _encode_input) for invalid values.
+    """
+    return {
+        "encoded_vector": _to_vector(_encode_input(profile)),
+        "encoding_version": ENCODING_VERSION,
+    }
+
+def _from_vector(vector) -> dict:
+    """Inverse of _to_vector, including the raw fever/cough/... keys."""
+    encoded = dict(zip(FEATURE_ORDER, vector))
+    for raw_key, feature in DERIVED_FEATURES.items():
+        encoded[raw_key] = encoded[feature]
+    return encoded
+
 # --------- Model loader----------
 
 _model = None
+_model_version = None
 def get_model():
-    global _model
+    global _model, _model_version
     if _model is None:
+        # joblib/catboost are heavy imports; only pay for them on first predict
+        from joblib import load
         model_path = os.path.join(
             os.path.dirname(__file__),
             "..", "ml_model", "catboost_model.pkl"
         )
         if os.path.exists(model_path):
             _model = load(model_path)
-            print(f"✓ Model loaded from {model_path}")
+            with open(model_path, "rb") as f:
+                _model_version = hashlib.sha256(f.read()).hexdigest()[:12]
+            print(f"✓ Model loaded from {model_path} (version {_model_version})")
         else:
             raise FileNotFoundError(
                 f"Model not found at {model_path}. "
@@ -122,10 +162,16 @@ def get_model():
             )
     return _model
 
+def get_model_version():
+    """Short content hash of the loaded model file; changes whenever the .pkl is replaced."""
+    get_model()
+    return _model_version
+
 # --------- Route: /api/predict ---------
 
 @prediction_bp.route("/predict", methods=["POST"])
 @jwt_required()
+@limit_inference
 def predict():
     """
     Uses the patient's saved profile from db.patients (by email from JWT).
@@ -145,48 +191,300 @@ def predict():
     overrides = request.get_json() or {}
     profile = {**stored, **overrides}
 
-    # 3) Validate + encode
-    try:
-        encoded = _encode_input(profile)
-    except ValueError as e:
-        return jsonify({"error": str(e)}), 400
-
-    vector = _to_vector(encoded)
+    # 3) Validate + encode (reuse the vector update_profile stored, unless overridden)
+    if not overrides and stored.get("encoding_version") == ENCODING_VERSION and stored.get("encoded_vector"):
+        vector = stored["encoded_vector"]
+        encoded = _from_vector(vector)
+    else:
+        try:
+            encoded = _encode_input(profile)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        vector = _to_vector(encoded)
 
-    # 4) Predict
-    model = get_model()
-    proba = model.predict_proba([vector])[0]  # [p0, p1]
-    label = int(proba[1] >= 0.5) #1 = positive, 0 = negative
+    # 4) Predict -- skipped when neither the profile nor the model changed since last time
+    model_version = get_model_version()
+    profile_version = stored.get("profile_version")
+    last = stored.get("last_prediction") or {}
+    if (not overrides and profile_version is not None
+            and last.get("profile_version") == profile_version
+            and last.get("model_version") == model_version):
+        p1 = last["probability"]
+    else:
+        model = get_model()
+        with timed(MODEL_PREDICT_SECONDS):
+            proba = model.predict_proba([vector])[0]  # [p0, p1]
+        p1 = float(proba[1])
+        if not overrides and profile_version is not None:
+            # guarded by profile_version so a concurrent profile edit isn't masked
+            db.patients.update_one(
+                {"email": email, "profile_version": profile_version},
+                {"$set": {"last_prediction": {"profile_version": profile_version,
+                                              "model_version": model_version,
+                                              "probability": p1}}},
+            )
+    label = int(p1 >= 0.5) #1 = positive, 0 = negative
 
-     # Save prediction
-    pred_doc = {
-        "patient_email": email,
-        "features": encoded,
-        "feature_order": FEATURE_ORDER,
-        "result": {"label": label, "probability": float(proba[1])},
-        "created_at": datetime.utcnow()
-    }
+     # Save prediction (compact: vector + schema reference, see prediction_store)
+    pred_doc = compact_prediction_doc(
+        email, vector, FEATURE_ORDER, model_version,
+        {"label": label, "probability": p1},
+        datetime.utcnow(),
+    )
     inserted = db.predictions.insert_one(pred_doc)
+    record_prediction(email, p1, pred_doc["created_at"])
+    record_drift(FEATURE_ORDER, vector, p1)
 
     # 4.5) Add prediction to blockchain
     block_data = {
         "patient_email": email,
         "prediction_id": str(inserted.inserted_id),
         "label": label,
-        "probability": float(proba[1]),
+        "probability": p1,
         "created_at": pred_doc["created_at"].isoformat() + "Z",
     }
-    new_block = blockchain.add_block(block_data)
+    with timed(LEDGER_APPEND_SECONDS):
+        new_block = blockchain.add_block(block_data)
 
     # 5) Respond
-    return jsonify({
+    response = jsonify({
         "input_used": encoded,
         "vector_order": FEATURE_ORDER,
-        "result": {"label": label, "probability": float(proba[1])},
+        "result": {"label": label, "probability": p1},
         "prediction_id": str(inserted.inserted_id),
         "block": {
             "index": new_block.index,
             "hash": new_block.hash,
             "previous_hash": new_block.previous_hash,
         }
+    })
+
+    # 6) Shadow mode: hand the vector to the candidate model once the response is sent
+    if shadow is not None:
+        prediction_id = inserted.inserted_id
+        response.call_on_close(lambda: shadow.submit(prediction_id, vector, p1))
+    return response, 200
+
+# --------- Route: /api/predictions/<id> ---------
+
+@prediction_bp.get("/predictions/<prediction_id>")
+@jwt_required()
+def get_prediction(prediction_id):
+    """
+    Patient: one of their own predictions. Doctor: any prediction.
+    Compact documents are expanded back to features + feature_order.
+    """
+    claims = get_jwt()
+    try:
+        pid = ObjectId(prediction_id)
+    except Exception:
+        return jsonify({"error": "Invalid prediction_id"}), 400
+
+    filters = {}
+    if claims.get("role") == "patient":
+        filters["patient_email"] = get_jwt_identity()
+    elif claims.get("role") != "doctor":
+        return jsonify({"error": "Access denied"}), 403
+
+    try:
+        doc = load_prediction(pid, **filters)
+    except PredictionDataError as e:
+        return jsonify({"error": str(e)}), 500
+    if not doc:
+        return jsonify({"error": "Prediction not found"}), 404
+    return jsonify(doc), 200
+
+
+# --------- Routes: /api/predictions/history and /api/predictions/trend ---------
+
+def _target_patient():
+    """
+    Patients always see their own data; doctors pass ?email=<patient>.
+    Returns (email, None) or (None, error_response).
+    """
+    claims = get_jwt()
+    if claims.get("role") == "patient":
+        return get_jwt_identity(), None
+    if claims.get("role") == "doctor":
+        email = request.args.get("email")
+        if not email:
+            return None, (jsonify({"error": "email query param required"}), 400)
+        return email, None
+    return None, (jsonify({"error": "Access denied"}), 403)
+
+@prediction_bp.get("/predictions/history")
+@jwt_required()
+def prediction_history():
+    """
+    Newest-first prediction results without feature payloads.
+    ?limit=<1..100, default 20>&cursor=<next_cursor from the previous page>
+    """
+    email, error = _target_patient()
+    if error:
+        return error
+
+    try:
+        limit = max(1, min(int(request.args.get("limit", 20)), 100))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    query = {"patient_email": email}
+    cursor_str = request.args.get("cursor")
+    if cursor_str:
+        if not ObjectId.is_valid(cursor_str):
+            return jsonify({"error": "Invalid cursor"}), 400
+        query["_id"] = {"$lt": ObjectId(cursor_str)}
+
+    items = list(db.predictions.find(query, {"result": 1, "created_at": 1})
+                 .sort("_id", -1).limit(limit))
+    next_cursor = str(items[-1]["_id"]) if len(items) == limit else None
+    return jsonify({"items": items, "next_cursor": next_cursor}), 200
+
+def _parse_day(value, default):
+    if not value:
+        return default
+    return datetime.strptime(value, "%Y-%m-%d")
+
+@prediction_bp.get("/predictions/trend")
+@jwt_required()
+def prediction_trend():
+    """
+    Probability trend from the per-patient rollups.
+    ?granularity=day|week (default day)&from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive, default last 90 days)
+    """
+    email, error = _target_patient()
+    if error:
+        return error
+
+    granularity = request.args.get("granularity", "day")
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": "granularity must be 'day' or 'week'"}), 400
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        end = _parse_day(request.args.get("to"), today) + timedelta(days=1)
+        start = _parse_day(request.args.get("from"), end - timedelta(days=90))
+    except ValueError:
+        return jsonify({"error": "from/to must be YYYY-MM-DD"}), 400
+
+    buckets = get_trend(email, granularity, start, end)
+    return jsonify({"patient_email": email, "granularity": granularity, "buckets": buckets}), 200
+
+
+# --------- Routes: SHAP explanations ---------
+
+MAX_EXPLANATIONS_PER_REQUEST = 200
+
+def _explain(docs):
+    """SHAP explanations (current model) for expanded prediction docs, batched."""
+    model = get_model()
+    model_version = get_model_version()
+    vectors = [[d["features"][k] for k in FEATURE_ORDER] for d in docs]
+    explanations = explain_vectors(model, model_version, FEATURE_ORDER, vectors)
+    return [{
+        "prediction_id": d["_id"],
+        "model_version": model_version,
+        "prediction_model_version": d.get("model_version"),
+        "result": d.get("result"),
+        **e,
+    } for d, e in zip(docs, explanations)]
+
+@prediction_bp.get("/predictions/<prediction_id>/explanation")
+@jwt_required()
+@limit_inference
+def explain_prediction(prediction_id):
+    """
+    Per-feature SHAP contributions (log-odds) for one stored prediction.
+    Patients may only explain their own predictions.
+    """
+    claims = get_jwt()
+    try:
+        pid = ObjectId(prediction_id)
+    except Exception:
+        return jsonify({"error": "Invalid prediction_id"}), 400
+
+    filters = {}
+    if claims.get("role") == "patient":
+        filters["patient_email"] = get_jwt_identity()
+    elif claims.get("role") != "doctor":
+        return jsonify({"error": "Access denied"}), 403
+
+    try:
+        doc = load_prediction(pid, **filters)
+    except PredictionDataError as e:
+        return jsonify({"error": str(e)}), 500
+    if not doc:
+        return jsonify({"error": "Prediction not found"}), 404
+    return jsonify(_explain([doc])[0]), 200
+
+@prediction_bp.post("/predictions/explanations")
+@jwt_required()
+@limit_inference
+def explain_predictions():
+    """
+    Doctor-only batch form, e.g. for a roster view.
+    Body: {"prediction_ids": ["<id>", ...]} (up to 200)
+    """
+    claims = get_jwt()
+    if claims.get("role") != "doctor":
+        return jsonify({"error": "Access denied"}), 403
+
+    ids = (request.get_json() or {}).get("prediction_ids") or []
+    if not isinstance(ids, list) or len(ids) > MAX_EXPLANATIONS_PER_REQUEST:
+        return jsonify({"error": f"prediction_ids must be a list of at most {MAX_EXPLANATIONS_PER_REQUEST} ids"}), 400
+    if not all(isinstance(i, str) and ObjectId.is_valid(i) for i in ids):
+        return jsonify({"error": "Invalid prediction_id"}), 400
+
+    try:
+        docs = load_predictions([ObjectId(i) for i in ids])
+    except PredictionDataError as e:
+        return jsonify({"error": str(e)}), 500
+    found = [docs[ObjectId(i)] for i in ids if ObjectId(i) in docs]
+    missing = [i for i in ids if ObjectId(i) not in docs]
+    return jsonify({"items": _explain(found) if found else [], "missing": missing}), 200
+
+
+# --------- Route: /api/shadow/summary ---------
+@prediction_bp.get("/shadow/summary")
+@jwt_required()
+def shadow_evaluation_summary():
+    """
+    Doctor-only: how the shadow (candidate) model compares with the live one.
+    ?candidate_version=<sha> limits to one candidate. `worker` describes this process's queue.
+    """
+    claims = get_jwt()
+    if claims.get("role") != "doctor":
+        return jsonify({"error": "Access denied"}), 403
+
+    worker = None
+    if shadow is not None:
+        worker = {"queued": shadow.queue.qsize(), "dropped": shadow.dropped}
+    return jsonify({
+        "enabled": shadow is not None,
+        "worker": worker,
+        "candidates": shadow_summary(request.args.get("candidate_version")),
     }), 200
+
+# --------- Route: /api/drift ---------
+@prediction_bp.get("/drift")
+@jwt_required()
+def drift_status():
+    """
+    Doctor-only: PSI/KS of recent predict() inputs and outputs against the
+    stored reference profile. ?hours=<1..720, default 24>
+    """
+    claims = get_jwt()
+    if claims.get("role") != "doctor":
+        return jsonify({"error": "Access denied"}), 403
+
+    try:
+        hours = int(request.args.get("hours", 24))
+    except ValueError:
+        return jsonify({"error": "hours must be an integer"}), 400
+    if not 1 <= hours <= 720:
+        return jsonify({"error": "hours must be between 1 and 720"}), 400
+
+    report = drift_report(hours)
+    if report is None:
+        return jsonify({"error": "No drift reference profile; run app.scripts.build_drift_reference"}), 404
+    return jsonify(report), 200
@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.database import db
+
+# Bookings claim fixed-size slot documents with unique _ids, so two overlapping
+# requests can never both succeed, even across workers (no transactions needed).
+SLOT_MINUTES = 15
+DEFAULT_DURATION_MINUTES = 60
+MAX_DURATION_MINUTES = 8 * 60
+ACTIVE_STATUSES = ["pending", "accepted"]
+INDEX_TTL_SECONDS = float(os.getenv("SCHEDULE_INDEX_TTL", "30"))
+DUPLICATE_KEY = 11000
+
+
+def parse_utc(value: str) -> datetime:
+    """ISO 8601 -> aware UTC datetime. Values without an offset are taken as UTC."""
+    dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def as_utc(dt: datetime) -> datetime:
+    """pymongo returns naive datetimes that are UTC."""
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+# --------- Slot claims (atomic booking) ---------
+
+def _slot_starts(start: datetime, end: datetime) -> List[datetime]:
+    floor = start - timedelta(minutes=start.minute % SLOT_MINUTES, seconds=start.second,
+                              microseconds=start.microsecond)
+    slots = []
+    t = floor
+    while t < end:
+        slots.append(t)
+        t += timedelta(minutes=SLOT_MINUTES)
+    return slots
+
+def claim_slots(doctor_email: str, start: datetime, end: datetime, appointment_id: ObjectId) -> bool:
+    """
+    Insert one document per slot covered by [start, end). Inserts are ordered
+    and ascending, so competing bookings always collide on their earliest
+    shared slot; the loser removes only the slots it inserted and gets False.
+    A slot already held by the same appointment (e.g. a repeated accept)
+    counts as claimed.
+    """
+    pending = [{
+        "_id": f"{doctor_email}|{s.strftime('%Y-%m-%dT%H:%M')}",
+        "doctor_email": doctor_email,
+        "appointment_id": appointment_id,
+        "start": s,
+    } for s in _slot_starts(start, end)]
+    inserted = []
+    while pending:
+        try:
+            db.appointment_slots.insert_many(pending, ordered=True)
+            return True
+        except BulkWriteError as e:
+            done = e.details.get("nInserted", 0)
+            inserted += [d["_id"] for d in pending[:done]]
+            errors = e.details.get("writeErrors") or []
+            if not errors or errors[0].get("code") != DUPLICATE_KEY:
+                _unclaim(inserted, appointment_id)
+                raise
+            conflict = pending[errors[0]["index"]]
+            owner = db.appointment_slots.find_one({"_id": conflict["_id"]}, {"appointment_id": 1})
+            if not owner or owner.get("appointment_id") != appointment_id:
+                _unclaim(inserted, appointment_id)
+                return False
+            pending = pending[errors[0]["index"] + 1:]
+    return True
+
+def _unclaim(slot_ids: List[str], appointment_id: ObjectId) -> None:
+    if slot_ids:
+        db.appointment_slots.delete_many({"_id": {"$in": slot_ids}, "appointment_id": appointment_id})
+
+def release_slots(appointment_id: ObjectId) -> None:
+    db.appointment_slots.delete_many({"appointment_id": appointment_id})
+
+
+# --------- Availability windows ---------
+
+def parse_windows(windows) -> List[Dict]:
+    """
+    Validate weekly availability windows (UTC):
+    [{"weekday": 0-6 (Mon=0), "start": "HH:MM", "end": "HH:MM"}, ...]
+    """
+    if not isinstance(windows, list):
+        raise ValueError("windows must be a list")
+    out = []
+    for w in windows:
+        try:
+            weekday = int(w["weekday"])
+            start = datetime.strptime(w["start"], "%H:%M").time()
+            end = datetime.strptime(w["end"], "%H:%M").time()
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("each window needs weekday (0-6), start and end (HH:MM)")
+        if not 0 <= weekday <= 6 or start >= end:
+            raise ValueError("weekday must be 0-6 and start must be before end")
+        if start.minute % SLOT_MINUTES or end.minute % SLOT_MINUTES:
+            raise ValueError(f"window times must be on a {SLOT_MINUTES}-minute boundary")
+        out.append({"weekday": weekday, "start": w["start"], "end": w["end"]})
+    return out
+
+def get_windows(doctor_email: str) -> List[Dict]:
+    doc = db.doctor_availability.find_one({"_id": doctor_email}, {"windows": 1})
+    return doc["windows"] if doc else []
+
+def _window_ranges(windows, day: datetime) -> List[Tuple[datetime, datetime]]:
+    ranges = []
+    for w in windows:
+        if w["weekday"] == day.weekday():
+            sh, sm = map(int, w["start"].split(":"))
+            eh, em = map(int, w["end"].split(":"))
+            ranges.append((day.replace(hour=sh, minute=sm), day.replace(hour=eh, minute=em)))
+    return sorted(ranges)
+
+def within_availability(windows, start: datetime, end: datetime) -> bool:
+    """True if [start, end) sits inside one window. No windows configured = always available."""
+    if not windows:
+        return True
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    return any(ws <= start and end <= we for ws, we in _window_ranges(windows, day))
+
+
+# --------- In-memory interval index ---------
+
+class IntervalIndex:
+    """
+    Booked [start, end) intervals for one doctor, sorted by start, with a
+    running maximum of end times. "Does [s, e) overlap anything?" is a single
+    bisect: only intervals starting before e can overlap, and one of them does
+    iff the largest end among them is after s.
+    """
+
+    def __init__(self, intervals: List[Tuple[datetime, datetime]] = ()):
+        self._intervals = sorted(intervals)
+        self._starts = [s for s, _ in self._intervals]
+        self._max_end = []
+        current = None
+        for _, e in self._intervals:
+            current = e if current is None or e > current else current
+            self._max_end.append(current)
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        idx = bisect_left(self._starts, end)
+        return idx > 0 and self._max_end[idx - 1] > start
+
+    def __len__(self):
+        return len(self._intervals)
+
+
+_indexes: Dict[str, Tuple[float, IntervalIndex]] = {}
+_indexes_lock = threading.Lock()
+
+def get_interval_index(doctor_email: str) -> IntervalIndex:
+    """
+    Per-doctor index of active upcoming bookings, rebuilt from Mongo (using the
+    doctor_email/start_at/end_at index) at most every INDEX_TTL_SECONDS. Only
+    used for free-slot queries; booking correctness comes from claim_slots.
+    """
+    now = time.monotonic()
+    with _indexes_lock:
+        cached = _indexes.get(doctor_email)
+        if cached and now - cached[0] < INDEX_TTL_SECONDS:
+            return cached[1]
+
+    since = datetime.now(timezone.utc) - timedelta(days=1)
+    cursor = db.appointments.find(
+        {"doctor_email": doctor_email, "status": {"$in": ACTIVE_STATUSES}, "end_at": {"$gt": since}},
+        {"_id": 0, "start_at": 1, "end_at": 1},
+    )
+    index = IntervalIndex([(as_utc(d["start_at"]), as_utc(d["end_at"])) for d in cursor])
+    with _indexes_lock:
+        _indexes[doctor_email] = (now, index)
+    return index
+
+def invalidate_interval_index(doctor_email: str) -> None:
+    with _indexes_lock:
+        _indexes.pop(doctor_email, None)
+
+def free_slots(doctor_email: str, start: datetime, end: datetime,
+               slot_minutes: int = DEFAULT_DURATION_MINUTES) -> List[Dict[str, datetime]]:
+    """Bookable [start, end) slots of `slot_minutes` inside the doctor's windows."""
+    windows = get_windows(doctor_email)
+    index = get_interval_index(doctor_email)
+    length = timedelta(minutes=slot_minutes)
+    now = datetime.now(timezone.utc)
+
+    slots = []
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        ranges = _window_ranges(windows, day) if windows else [(day, day + timedelta(days=1))]
+        for ws, we in ranges:
+            t = ws
+            while t + length <= we:
+                if t >= start and t + length <= end and t >= now and not index.overlaps(t, t + length):
+                    slots.append({"start": t, "end": t + length})
+                t += length
+        day += timedelta(days=1)
+    return slots
@@ -0,0 +1,117 @@
+# scripts/archive_predictions.py
+# Retention policy for db.predictions: predictions older than N whole months
+# are moved into one zlib-compressed BSON blob per (patient, month) -- stored
+# inline in db.prediction_archives or as a file under PREDICTION_ARCHIVE_DIR --
+# and replaced by a tiny stub in db.prediction_stubs, so ids referenced from
+# ledger blocks and notes still resolve through load_prediction().
+# Safe to stop and re-run: a bucket is written (merged with any existing
+# archive) before its stubs are inserted and the originals deleted.
+# Run: python -m app.scripts.archive_predictions [--months 12] [--storage mongo|file] [--dry-run]
+# (schedule it, e.g. nightly from cron)
+import argparse
+import hashlib
+import os
+import time
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from app.database import db
+from app.prediction_store import (
+    PREDICTION_ARCHIVE_DIR, archive_id_for, encode_archive, read_archive,
+)
+
+PREDICTION_RETENTION_MONTHS = int(os.getenv("PREDICTION_RETENTION_MONTHS", "12"))
+
+
+def cutoff_for(months, now=None):
+    """First instant of the month `months` months before the current one (UTC)."""
+    now = now or datetime.utcnow()
+    total = now.year * 12 + (now.month - 1) - months
+    return datetime(total // 12, total % 12 + 1, 1)
+
+def _archive_file(archive_id):
+    email, month = archive_id.rsplit("|", 1)
+    # no raw emails in paths
+    return os.path.join(hashlib.sha1(email.encode("utf-8")).hexdigest()[:16], f"{month}.bson.zlib")
+
+def _write_bucket(archive_id, patient_email, docs, storage, dry_run):
+    existing = db.prediction_archives.find_one({"_id": archive_id})
+    if existing:
+        # a previous run was interrupted (or a late write landed): merge by _id
+        merged = {d["_id"]: d for d in read_archive(existing)}
+        merged.update((d["_id"], d) for d in docs)
+        docs = list(merged.values())
+    docs = sorted(docs, key=lambda d: d["created_at"])  # oldest first; first_at/last_at rely on it
+    if dry_run:
+        return len(docs)
+
+    data = encode_archive(docs)
+    archive = {
+        "patient_email": patient_email,
+        "month": datetime(docs[0]["created_at"].year, docs[0]["created_at"].month, 1),
+        "count": len(docs),
+        "first_at": docs[0]["created_at"],
+        "last_at": docs[-1]["created_at"],
+        "codec": "zlib+bson",
+        "archived_at": datetime.utcnow(),
+    }
+    if storage == "file":
+        rel = _archive_file(archive_id)
+        path = os.path.join(PREDICTION_ARCHIVE_DIR, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        update = {"$set": {**archive, "storage": "file", "file": rel}, "$unset": {"data": ""}}
+    else:
+        update = {"$set": {**archive, "storage": "mongo", "data": data}, "$unset": {"file": ""}}
+    db.prediction_archives.update_one({"_id": archive_id}, update, upsert=True)
+
+    db.prediction_stubs.bulk_write([UpdateOne(
+        {"_id": d["_id"]},
+        {"$set": {"patient_email": patient_email, "archive_id": archive_id}},
+        upsert=True,
+    ) for d in docs], ordered=False)
+    db.predictions.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+    return len(docs)
+
+def archive(months=PREDICTION_RETENTION_MONTHS, storage="mongo", dry_run=False):
+    cutoff = cutoff_for(months)
+    start = time.perf_counter()
+    print(f"Archiving predictions created before {cutoff:%Y-%m-%d} ({storage} storage)"
+          + (" [dry run]" if dry_run else ""))
+
+    # follows the (patient_email: 1, created_at: -1) index, so no in-memory sort;
+    # each (patient, month) bucket is still contiguous and _write_bucket re-sorts it
+    cursor = db.predictions.find({"created_at": {"$lt": cutoff}}).sort(
+        [("patient_email", 1), ("created_at", -1)]).batch_size(1000)
+
+    archived = buckets = 0
+    current_id, current_email, bucket = None, None, []
+    for doc in cursor:
+        archive_id = archive_id_for(doc["patient_email"], doc["created_at"])
+        if archive_id != current_id:
+            if bucket:
+                archived += _write_bucket(current_id, current_email, bucket, storage, dry_run)
+                buckets += 1
+            current_id, current_email, bucket = archive_id, doc["patient_email"], []
+        bucket.append(doc)
+    if bucket:
+        archived += _write_bucket(current_id, current_email, bucket, storage, dry_run)
+        buckets += 1
+
+    print(f"{'Would archive' if dry_run else 'Archived'} {archived} predictions into {buckets} "
+          f"patient-month buckets in {time.perf_counter() - start:.1f}s.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old predictions into compressed monthly archives.")
+    parser.add_argument("--months", type=int, default=PREDICTION_RETENTION_MONTHS,
+                        help="Keep this many whole months hot (default: PREDICTION_RETENTION_MONTHS or 12).")
+    parser.add_argument("--storage", choices=["mongo", "file"], default="mongo",
+                        help="Keep archives in prediction_archives or as files under PREDICTION_ARCHIVE_DIR.")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    if args.months < 1:
+        parser.error("--months must be at least 1")
+    archive(months=args.months, storage=args.storage, dry_run=args.dry_run)
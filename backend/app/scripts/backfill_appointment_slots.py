@@ -0,0 +1,57 @@
+# scripts/backfill_appointment_slots.py
+# Appointments created before start_at/end_at existed only have the
+# requested_time string, so they never block new bookings. This parses
+# requested_time (DEFAULT_DURATION_MINUTES long), stores start_at/end_at and
+# claims slots for active upcoming ones. Safe to re-run: only appointments
+# without start_at are picked up, and claims by the same appointment succeed.
+# Run: python -m app.scripts.backfill_appointment_slots [--dry-run]
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from app.database import db
+from app.utils.http_cache import bump_version, scope_key
+from app.scheduling import (
+    ACTIVE_STATUSES, DEFAULT_DURATION_MINUTES, parse_utc, claim_slots, invalidate_interval_index,
+)
+
+def backfill(dry_run=False):
+    now = datetime.now(timezone.utc)
+    parsed = claimed = unparseable = 0
+    conflicts = []
+    cursor = db.appointments.find(
+        {"start_at": {"$exists": False}},
+        {"doctor_email": 1, "patient_email": 1, "requested_time": 1, "status": 1},
+    )
+    for appt in cursor:
+        try:
+            start = parse_utc(str(appt.get("requested_time") or ""))
+        except ValueError:
+            unparseable += 1
+            print(f"  {appt['_id']}: cannot parse requested_time {appt.get('requested_time')!r}, skipped")
+            continue
+        end = start + timedelta(minutes=DEFAULT_DURATION_MINUTES)
+        parsed += 1
+        if dry_run:
+            continue
+
+        if appt.get("status") in ACTIVE_STATUSES and end > now:
+            if claim_slots(appt["doctor_email"], start, end, appt["_id"]):
+                claimed += 1
+            else:
+                # two legacy bookings overlap; leave it to the doctor to resolve
+                conflicts.append(appt["_id"])
+        db.appointments.update_one({"_id": appt["_id"]}, {"$set": {"start_at": start, "end_at": end}})
+        invalidate_interval_index(appt["doctor_email"])
+        bump_version(scope_key("appointments", "patient_email", appt.get("patient_email")),
+                     scope_key("appointments", "doctor_email", appt["doctor_email"]))
+
+    print(f"{'Would parse' if dry_run else 'Parsed'} {parsed} appointments "
+          f"({claimed} upcoming claimed slots, {unparseable} unparseable).")
+    for _id in conflicts:
+        print(f"  {_id}: overlaps another booking, no slots claimed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Give legacy appointments start_at/end_at and slot claims.")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    backfill(dry_run=args.dry_run)
@@ -0,0 +1,62 @@
+# scripts/build_drift_reference.py
+# Store the reference profile that /api/drift compares live traffic against.
+# Either from a CSV of model inputs (columns = FEATURE_ORDER, e.g. the training
+# set), scored with the current model, or from the hourly drift windows of a
+# period known to be healthy.
+# Run: python -m app.scripts.build_drift_reference --csv training.csv
+#      python -m app.scripts.build_drift_reference --from 2025-01-01 --to 2025-02-01
+import argparse
+import csv
+from datetime import datetime
+
+from app.database import db
+from app.drift import DriftSketch, REFERENCE_ID, load_windows, merge_docs
+from app.routes.prediction_routes import FEATURE_ORDER, get_model, get_model_version
+
+def _score_rows(model, sketch, rows):
+    for row, proba in zip(rows, model.predict_proba(rows)):
+        sketch.add(row, float(proba[1]))
+
+def from_csv(path, chunk_size=10000):
+    model = get_model()
+    sketch = DriftSketch(FEATURE_ORDER)
+    with open(path, newline="") as f:
+        rows = []
+        for record in csv.DictReader(f):
+            rows.append([float(record[k]) for k in FEATURE_ORDER])
+            if len(rows) >= chunk_size:
+                _score_rows(model, sketch, rows)
+                rows = []
+        if rows:
+            _score_rows(model, sketch, rows)
+    return sketch.to_doc(), f"csv:{path}"
+
+def from_windows(start, end):
+    windows = load_windows(start, end)
+    return merge_docs(windows), f"windows:{start:%Y-%m-%d}..{end:%Y-%m-%d}"
+
+def save_reference(profile, source):
+    if not profile["count"]:
+        raise SystemExit("No rows found; reference not changed.")
+    db.drift_reference.replace_one({"_id": REFERENCE_ID}, {
+        **profile,
+        "source": source,
+        "model_version": get_model_version(),
+        "built_at": datetime.utcnow(),
+    }, upsert=True)
+    print(f"Stored drift reference from {source} ({profile['count']} rows).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the drift reference profile.")
+    parser.add_argument("--csv", help="CSV with one column per model feature.")
+    parser.add_argument("--from", dest="start", help="YYYY-MM-DD, start of a healthy period (windows).")
+    parser.add_argument("--to", dest="end", help="YYYY-MM-DD, end of that period (exclusive).")
+    args = parser.parse_args()
+
+    if args.csv:
+        save_reference(*from_csv(args.csv))
+    elif args.start and args.end:
+        save_reference(*from_windows(datetime.strptime(args.start, "%Y-%m-%d"),
+                                     datetime.strptime(args.end, "%Y-%m-%d")))
+    else:
+        parser.error("pass --csv, or --from and --to")
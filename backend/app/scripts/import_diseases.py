@@ -0,0 +1,135 @@
+# scripts/import_diseases.py
+# Stream a large disease catalog (CSV or JSONL, optionally .gz) into db.diseases
+# with batched, unordered bulk upserts keyed by code.
+#
+# CSV columns: code,name,description,symptoms,risk_factors,treatments,tags
+# (list columns are separated by "|" or ";"). JSONL: one disease object per line.
+#
+# Run: python -m app.scripts.import_diseases catalog.csv [--batch-size 2000] [--strict]
+import argparse
+import csv
+import gzip
+import io
+import json
+import time
+
+from pymongo import UpdateOne
+
+from app.database import db
+from app.routes.disease_routes import CATALOG_VERSION_KEY
+from app.utils.http_cache import bump_version
+
+STRING_FIELDS = ["code", "name", "description"]
+LIST_FIELDS = ["symptoms", "risk_factors", "treatments", "tags"]
+REQUIRED_FIELDS = ["code", "name"]
+
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+def read_records(path, fmt=None):
+    """
+    Yield raw records one at a time (dicts for CSV, unparsed lines for JSONL,
+    so a bad line is rejected by validate() instead of aborting the import).
+    The file is never loaded whole.
+    """
+    fmt = fmt or ("jsonl" if ".jsonl" in path or ".ndjson" in path else "csv")
+    with _open_text(path) as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+
+def _as_list(value):
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        items = value
+    else:
+        items = str(value).replace(";", "|").split("|")
+    return [str(v).strip() for v in items if str(v).strip()]
+
+def validate(raw):
+    """
+    Normalize one record to the disease document shape used by the catalog
+    routes. `raw` is a dict or a JSON line. Raises ValueError on invalid input.
+    """
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"invalid JSON ({e.msg})")
+    if not isinstance(raw, dict):
+        raise ValueError("record must be an object")
+    doc = {}
+    for field in STRING_FIELDS:
+        value = raw.get(field)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{field} must be a string")
+        value = (value or "").strip()
+        if field in REQUIRED_FIELDS and not value:
+            raise ValueError(f"{field} is required")
+        doc[field] = value
+    for field in LIST_FIELDS:
+        doc[field] = _as_list(raw.get(field))
+    return doc
+
+def write_batch(docs):
+    if docs:
+        db.diseases.bulk_write(
+            [UpdateOne({"code": d["code"]}, {"$set": d}, upsert=True) for d in docs],
+            ordered=False,
+        )
+
+def prepare_catalog():
+    """Unique code index first, so every upsert in write_batch is an index lookup."""
+    db.diseases.create_index("code", unique=True)
+
+def finalize_catalog():
+    """Search index builds + cache-version bump, done once after the whole import."""
+    db.diseases.create_index("name")
+    db.diseases.create_index("tags")
+    bump_version(CATALOG_VERSION_KEY)
+
+def import_catalog(path, fmt=None, batch_size=2000, strict=False):
+    start = time.perf_counter()
+    imported = rejected = 0
+    # keyed by code: a repeated code inside one unordered batch could upsert twice
+    batch = {}
+    prepare_catalog()
+    for line_no, raw in enumerate(read_records(path, fmt), start=1):
+        try:
+            doc = validate(raw)
+        except ValueError as e:
+            if strict:
+                raise ValueError(f"record {line_no}: {e}")
+            rejected += 1
+            if rejected <= 20:
+                print(f"  skipped record {line_no}: {e}")
+            continue
+        batch[doc["code"]] = doc
+        if len(batch) >= batch_size:
+            write_batch(list(batch.values()))
+            imported += len(batch)
+            batch = {}
+    write_batch(list(batch.values()))
+    imported += len(batch)
+
+    finalize_catalog()
+    elapsed = time.perf_counter() - start
+    print(f"Imported {imported} diseases ({rejected} rejected) in {elapsed:.1f}s "
+          f"({imported / elapsed if elapsed else 0:.0f} rows/s).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import a disease catalog.")
+    parser.add_argument("path", help="CSV or JSONL file (optionally .gz)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Override detection by file name.")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--strict", action="store_true", help="Abort on the first invalid record.")
+    args = parser.parse_args()
+    import_catalog(args.path, fmt=args.format, batch_size=args.batch_size, strict=args.strict)
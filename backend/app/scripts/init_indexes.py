@@ -0,0 +1,9 @@
+# scripts/init_indexes.py
+# Run on deploy (not on every worker boot): python -m app.scripts.init_indexes
+# Exits non-zero if any index could not be created.
+import sys
+
+from app.database import init_indexes
+
+if __name__ == "__main__":
+    sys.exit(1 if init_indexes() else 0)
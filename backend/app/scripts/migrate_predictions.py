@@ -0,0 +1,63 @@
+# scripts/migrate_predictions.py
+# Rewrite old-style prediction documents (features dict + feature_order copy)
+# into the compact schema used by predict(). Safe to stop and re-run: only
+# documents that still have a `features` field are picked up.
+# Run: python -m app.scripts.migrate_predictions [--batch-size 1000] [--dry-run]
+import argparse
+import time
+
+from pymongo import UpdateOne
+
+from app.database import db
+from app.prediction_store import ensure_schema, LEGACY_MODEL_VERSION
+from app.routes.prediction_routes import FEATURE_ORDER
+
+def migrate(batch_size=1000, dry_run=False):
+    start = time.perf_counter()
+    cursor = db.predictions.find(
+        {"features": {"$exists": True}},
+        {"features": 1, "feature_order": 1},
+        batch_size=batch_size,
+    )
+
+    migrated = skipped = 0
+    ops = []
+
+    def flush():
+        nonlocal ops
+        if ops and not dry_run:
+            db.predictions.bulk_write(ops, ordered=False)
+        ops = []
+
+    for doc in cursor:
+        order = doc.get("feature_order") or FEATURE_ORDER
+        features = doc["features"]
+        if any(k not in features for k in order):
+            skipped += 1
+            continue
+        ops.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {
+                "$set": {
+                    "schema_id": ensure_schema(order, LEGACY_MODEL_VERSION),
+                    "x": [features[k] for k in order],
+                },
+                "$unset": {"features": "", "feature_order": ""},
+            },
+        ))
+        migrated += 1
+        if len(ops) >= batch_size:
+            flush()
+            print(f"  {migrated} migrated ({migrated / (time.perf_counter() - start):.0f} docs/s)")
+    flush()
+
+    verb = "Would migrate" if dry_run else "Migrated"
+    print(f"{verb} {migrated} predictions ({skipped} skipped: incomplete features) "
+          f"in {time.perf_counter() - start:.1f}s.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate predictions to the compact schema.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    migrate(batch_size=args.batch_size, dry_run=args.dry_run)
@@ -0,0 +1,40 @@
+# scripts/rebuild_rollups.py
+# Backfill db.prediction_rollups from existing predictions (predict() keeps
+# them current afterwards). Runs server-side with $group + $merge.
+# Run: python -m app.scripts.rebuild_rollups  (MongoDB 5.0+ for $dateTrunc)
+from app.database import db
+from app.rollups import GRANULARITIES
+
+def rebuild():
+    for granularity in GRANULARITIES:
+        unit = {"unit": granularity, "startOfWeek": "monday"} if granularity == "week" else {"unit": granularity}
+        db.predictions.aggregate([
+            {"$sort": {"created_at": 1}},
+            {"$group": {
+                "_id": {
+                    "patient_email": "$patient_email",
+                    "bucket_start": {"$dateTrunc": {"date": "$created_at", **unit}},
+                },
+                "count": {"$sum": 1},
+                "sum": {"$sum": "$result.probability"},
+                "min": {"$min": "$result.probability"},
+                "max": {"$max": "$result.probability"},
+                "last": {"$last": "$result.probability"},
+                "last_at": {"$last": "$created_at"},
+            }},
+            {"$project": {
+                "_id": {"$concat": [
+                    "$_id.patient_email", f"|{granularity}|",
+                    {"$dateToString": {"date": "$_id.bucket_start", "format": "%Y-%m-%d"}},
+                ]},
+                "patient_email": "$_id.patient_email",
+                "granularity": {"$literal": granularity},
+                "bucket_start": "$_id.bucket_start",
+                "count": 1, "sum": 1, "min": 1, "max": 1, "last": 1, "last_at": 1,
+            }},
+            {"$merge": {"into": "prediction_rollups", "on": "_id", "whenMatched": "replace"}},
+        ], allowDiskUse=True)
+        print(f"Rebuilt {granularity} rollups.")
+
+if __name__ == "__main__":
+    rebuild()
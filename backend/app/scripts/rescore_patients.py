@@ -0,0 +1,144 @@
+# scripts/rescore_patients.py
+# Re-score every stored profile in db.patients with the current model, outside
+# the web tier. Patients are streamed by _id in chunks, encoded/scored on a
+# process pool, and written to db.patient_scores with unordered bulk writes.
+# Progress is checkpointed per model version, so an interrupted run resumes;
+# a completed run is not repeated unless --restart is given.
+# Run: python -m app.scripts.rescore_patients [--workers 8] [--chunk-size 5000] [--restart]
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from app.database import db
+from app.routes.prediction_routes import (
+    _encode_input, _to_vector, get_model, get_model_version, ENCODING_VERSION,
+)
+
+PROFILE_FIELDS = ["email", "gender", "age", "fever", "cough", "fatigue",
+                  "difficulty_breathing", "blood_pressure", "cholesterol_level",
+                  "encoded_vector", "encoding_version"]
+
+# --------- worker process side ---------
+
+_worker_model = None
+
+def _init_worker():
+    global _worker_model
+    _worker_model = get_model()
+
+def _score_chunk(profiles):
+    """
+    Encode + score one chunk with the same logic as /api/predict.
+    Returns ([(email, probability)], [(email, error)]).
+    """
+    emails, vectors, errors = [], [], []
+    for profile in profiles:
+        try:
+            if profile.get("encoding_version") == ENCODING_VERSION and profile.get("encoded_vector"):
+                vectors.append(profile["encoded_vector"])  # precomputed by update_profile
+            else:
+                vectors.append(_to_vector(_encode_input(profile)))
+            emails.append(profile.get("email"))
+        except ValueError as e:
+            errors.append((profile.get("email"), str(e)))
+    scores = []
+    if vectors:
+        proba = _worker_model.predict_proba(vectors)
+        scores = [(email, float(p[1])) for email, p in zip(emails, proba)]
+    return scores, errors
+
+# --------- coordinator side ---------
+
+def _chunks(cursor, size):
+    chunk = []
+    for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _write_results(scores, errors, model_version):
+    now = datetime.utcnow()
+    ops = [UpdateOne(
+        {"_id": f"{email}|{model_version}"},
+        {"$set": {"patient_email": email, "model_version": model_version,
+                  "label": int(p >= 0.5), "probability": p, "scored_at": now},
+         "$unset": {"error": ""}},
+        upsert=True,
+    ) for email, p in scores]
+    ops += [UpdateOne(
+        {"_id": f"{email}|{model_version}"},
+        {"$set": {"patient_email": email, "model_version": model_version,
+                  "error": error, "scored_at": now}},
+        upsert=True,
+    ) for email, error in errors]
+    if ops:
+        db.patient_scores.bulk_write(ops, ordered=False)
+
+def rescore(workers=None, chunk_size=5000, restart=False):
+    workers = workers or os.cpu_count() or 1
+    model_version = get_model_version()
+    job_id = f"rescore:{model_version}"
+
+    checkpoint = None if restart else db.job_checkpoints.find_one({"_id": job_id})
+    if checkpoint and checkpoint.get("completed_at"):
+        print(f"{job_id} already completed at {checkpoint['completed_at']:%Y-%m-%d %H:%M} "
+              f"({checkpoint.get('processed', 0)} patients); use --restart to re-score.")
+        return
+    if checkpoint is None:
+        db.job_checkpoints.delete_one({"_id": job_id})  # fresh run: drop any old checkpoint
+    query = {"_id": {"$gt": checkpoint["last_id"]}} if checkpoint else {}
+    processed = checkpoint["processed"] if checkpoint else 0
+    if checkpoint:
+        print(f"Resuming {job_id} after {processed} patients.")
+
+    cursor = db.patients.find(query, {f: 1 for f in PROFILE_FIELDS}).sort("_id", 1).batch_size(chunk_size)
+
+    start = time.perf_counter()
+    done_this_run = 0
+    window = deque()  # (last _id in chunk, chunk size, future) in cursor order
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+
+        def drain_one():
+            nonlocal processed, done_this_run
+            last_id, size, future = window.popleft()
+            scores, errors = future.result()
+            _write_results(scores, errors, model_version)
+            processed += size
+            done_this_run += size
+            # chunks complete in cursor order, so everything up to last_id is written
+            db.job_checkpoints.update_one(
+                {"_id": job_id},
+                {"$set": {"last_id": last_id, "processed": processed, "updated_at": datetime.utcnow()}},
+                upsert=True,
+            )
+            rate = done_this_run / (time.perf_counter() - start)
+            print(f"  {processed} patients scored ({rate:.0f}/s)")
+
+        for chunk in _chunks(cursor, chunk_size):
+            last_id = chunk[-1]["_id"]
+            profiles = [{k: v for k, v in doc.items() if k != "_id"} for doc in chunk]
+            window.append((last_id, len(chunk), pool.submit(_score_chunk, profiles)))
+            if len(window) >= workers * 2:
+                drain_one()
+        while window:
+            drain_one()
+
+    db.job_checkpoints.update_one({"_id": job_id}, {"$set": {"completed_at": datetime.utcnow()}}, upsert=True)
+    print(f"Re-scored {done_this_run} patients with model {model_version} "
+          f"in {time.perf_counter() - start:.1f}s ({processed} total for this model).")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score all patient profiles with the current model.")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count).")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint (interrupted or completed) and start over.")
+    args = parser.parse_args()
+    rescore(workers=args.workers, chunk_size=args.chunk_size, restart=args.restart)
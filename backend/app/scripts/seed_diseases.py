@@ -1,6 +1,6 @@
 # scripts/seed_diseases.py
 # Run this once: python -m scripts.seed_diseases
-from app.database import db
+from app.scripts.import_diseases import prepare_catalog, write_batch, finalize_catalog
 
 DISEASES = [
     {
@@ -33,8 +33,10 @@ DISEASES = [
 ]
 
 def seed():
-    for d in DISEASES:
-        db.diseases.update_one({"code": d["code"]}, {"$set": d}, upsert=True)
+    # one bulk round trip instead of an update_one per disease
+    prepare_catalog()
+    write_batch(DISEASES)
+    finalize_catalog()
     print(f"Seeded {len(DISEASES)} diseases.")
 
 if __name__ == "__main__":
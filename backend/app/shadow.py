@@ -0,0 +1,121 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from app.database import db
+from app.metrics import SHADOW_PREDICT_SECONDS
+
+# Shadow scoring of a candidate model on live /api/predict traffic.
+# Enabled by pointing SHADOW_MODEL_PATH at a candidate .pkl. The request path
+# only does a non-blocking put on a bounded queue; a background thread scores
+# batches and writes the comparisons to db.shadow_evaluations. When the queue
+# is full, work is dropped rather than slowing down the primary path.
+SHADOW_MODEL_PATH = os.getenv("SHADOW_MODEL_PATH")
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
+SHADOW_BATCH_SIZE = int(os.getenv("SHADOW_BATCH_SIZE", "100"))
+SHADOW_FLUSH_SECONDS = float(os.getenv("SHADOW_FLUSH_SECONDS", "5"))
+
+
+class ShadowEvaluator:
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.queue = queue.Queue(maxsize=SHADOW_QUEUE_SIZE)
+        self.dropped = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, prediction_id, vector, primary_probability) -> None:
+        """Never blocks: drops the item if the worker is behind."""
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait((prediction_id, vector, primary_probability))
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+                    self._thread.start()
+
+    def _next_batch(self):
+        """Block for the first item, then collect up to a full batch or until the flush interval."""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + SHADOW_FLUSH_SECONDS
+        while len(batch) < SHADOW_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        from joblib import load
+        try:
+            model = load(self.model_path)
+            with open(self.model_path, "rb") as f:
+                version = hashlib.sha256(f.read()).hexdigest()[:12]
+        except Exception as e:
+            # queue fills up and submissions are dropped; the primary path is unaffected
+            print(f"Shadow model could not be loaded from {self.model_path}:", e)
+            return
+        print(f"✓ Shadow model loaded from {self.model_path} (version {version})")
+
+        while True:
+            batch = self._next_batch()
+            try:
+                start = time.perf_counter()
+                proba = model.predict_proba([vector for _, vector, _ in batch])
+                elapsed = time.perf_counter() - start
+                SHADOW_PREDICT_SECONDS.observe(elapsed)
+
+                now = datetime.utcnow()
+                docs = []
+                for (prediction_id, _, primary), row in zip(batch, proba):
+                    candidate = float(row[1])
+                    docs.append({
+                        "prediction_id": prediction_id,
+                        "candidate_version": version,
+                        "primary_probability": primary,
+                        "candidate_probability": candidate,
+                        "delta": candidate - primary,
+                        "agree": (candidate >= 0.5) == (primary >= 0.5),
+                        "candidate_latency_ms": elapsed * 1000 / len(batch),
+                        "batch_size": len(batch),
+                        "created_at": now,
+                    })
+                db.shadow_evaluations.insert_many(docs, ordered=False)
+            except Exception as e:
+                print("Shadow evaluation batch failed:", e)
+
+
+shadow = ShadowEvaluator(SHADOW_MODEL_PATH) if SHADOW_MODEL_PATH else None
+
+
+def shadow_summary(candidate_version=None):
+    """Agreement rate, probability deltas and candidate latency over recorded evaluations."""
+    match = {"candidate_version": candidate_version} if candidate_version else {}
+    rows = list(db.shadow_evaluations.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": "$candidate_version",
+            "count": {"$sum": 1},
+            "agreement_rate": {"$avg": {"$cond": ["$agree", 1, 0]}},
+            "mean_delta": {"$avg": "$delta"},
+            "mean_abs_delta": {"$avg": {"$abs": "$delta"}},
+            "max_abs_delta": {"$max": {"$abs": "$delta"}},
+            "mean_candidate_latency_ms": {"$avg": "$candidate_latency_ms"},
+            "last_at": {"$max": "$created_at"},
+        }},
+        {"$sort": {"last_at": -1}},
+    ]))
+    for r in rows:
+        r["candidate_version"] = r.pop("_id")
+    return rows
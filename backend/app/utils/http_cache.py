@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+import os
+from functools import wraps
+
+from flask import current_app, request
+from pymongo import UpdateOne
+from app.database import db
+
+try:
+    import brotli  # optional: `pip install Brotli` to enable br encoding
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain", "text/html", "text/csv"}
+_ENCODINGS = ["br", "gzip"] if brotli else ["gzip"]
+
+
+# --------- Response compression ---------
+
+def init_compression(app):
+    """
+    Compress JSON/text responses larger than COMPRESS_MIN_SIZE with brotli or
+    gzip, whichever the client prefers (brotli only if the module is installed).
+    """
+
+    @app.after_request
+    def _compress(response):
+        if (response.status_code < 200 or response.status_code >= 300
+                or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(_ENCODINGS)
+        if not encoding:
+            return response
+
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+
+        if encoding == "br":
+            response.set_data(brotli.compress(data, quality=4))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=5))
+        response.headers["Content-Encoding"] = encoding
+
+        # a strong ETag identifies one exact byte representation
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f"{etag}-{encoding}")
+        return response
+
+
+# --------- Conditional GET (ETag / 304) ---------
+
+def scope_key(resource, field, value):
+    """Version counter name for the slice of `resource` where field == value, e.g. notes:patient_email:<email>."""
+    return f"{resource}:{field}:{value}"
+
+def get_version(name):
+    """
+    Explicit version counter (a single _id lookup), for the disease catalog and
+    per-scope lists. Writers must call bump_version() after changing the data.
+    """
+    doc = db.resource_versions.find_one({"_id": name}, {"version": 1})
+    return str(doc["version"]) if doc else "0"
+
+def bump_version(*names):
+    """Bump one or more counters in a single round trip."""
+    db.resource_versions.bulk_write(
+        [UpdateOne({"_id": name}, {"$inc": {"version": 1}}, upsert=True) for name in names],
+        ordered=False,
+    )
+
+def _current_identity():
+    from flask_jwt_extended import get_jwt_identity
+    try:
+        return get_jwt_identity() or ""
+    except RuntimeError:  # route isn't behind @jwt_required
+        return ""
+
+def _current_role():
+    from flask_jwt_extended import get_jwt
+    try:
+        return get_jwt().get("role")
+    except RuntimeError:
+        return None
+
+def conditional_get(version_token, role=None):
+    """
+    Decorator for read endpoints. `version_token(*args, **kwargs)` must be much
+    cheaper than the view; its result (plus URL and caller) becomes a strong
+    ETag, and a matching If-None-Match short-circuits with 304 before the view
+    runs. Returning None from the token function skips caching for that request.
+    Place it below @jwt_required() so the caller identity is known.
+
+    Since a 304 skips the view, pass the view's required `role` as well: other
+    callers go straight to the view (and its 403) and never see an ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if role is not None and _current_role() != role:
+                return view(*args, **kwargs)
+            token = version_token(*args, **kwargs)
+            if token is None:
+                return view(*args, **kwargs)
+
+            raw = f"{token}|{request.full_path}|{_current_identity()}"
+            etag = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+            matched = next((candidate for candidate in [etag] + [f"{etag}-{enc}" for enc in _ENCODINGS]
+                            if request.if_none_match.contains(candidate)), None)
+            if matched:
+                # echo the variant the client holds (compressed ETags carry a suffix)
+                response = current_app.response_class(status=304)
+                response.set_etag(matched)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response.set_etag(etag)
+
+            response.cache_control.private = True
+            response.cache_control.no_cache = True  # always revalidate, but allow 304s
+            response.vary.add("Authorization")
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,46 @@
+import orjson
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+from pymongo.cursor import Cursor
+
+# naive datetimes from datetime.utcnow() are UTC -> serialize with "+00:00"
+_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """
+    Types orjson doesn't know natively. ObjectIds become strings and Mongo
+    cursors are drained, so routes can hand query results straight to jsonify.
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Cursor):
+        return list(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson. datetime, dataclasses and NumPy
+    scalars/arrays are encoded natively; ObjectId and cursors via _default.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self._dumpb(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumpb(obj), mimetype=self.mimetype)
+
+    def _dumpb(self, obj) -> bytes:
+        option = _OPTIONS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
@@ -0,0 +1,88 @@
+import html
+import re
+from typing import Dict, List
+
+from pymongo.errors import OperationFailure
+from app.database import db
+
+# Full-text search over db.notes.note, backed by the text index created in
+# init_indexes(). Mongo does the matching and ranking (textScore); snippets
+# are only built in Python for the page being returned.
+MAX_LIMIT = 50
+MAX_RESULTS = 1000     # deepest result reachable by page/limit
+SNIPPET_CHARS = 160
+MAX_QUERY_CHARS = 200
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def _query_terms(q: str) -> List[str]:
+    """Positive terms of a $text search string (quoted phrases split, -negations dropped)."""
+    terms = []
+    for token in re.findall(r'-?"[^"]*"|\S+', q):
+        if token.startswith("-"):
+            continue
+        terms += [t for t in re.findall(r"\w+", token.lower()) if len(t) > 2]  # skip "at", "on", ...
+    return terms
+
+def _stem(term: str) -> str:
+    # rough match for what the text index's stemmer treats as the same word
+    for suffix in _SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            return term[:-len(suffix)]
+    return term
+
+def highlight(text: str, terms: List[str], width: int = SNIPPET_CHARS) -> str:
+    """HTML-escaped window of `text` around the first hit, with hits wrapped in <mark>."""
+    stems = sorted({_stem(t) for t in terms}, key=len, reverse=True)
+    if not stems:
+        return html.escape(text[:width])
+    pattern = re.compile(r"\b(?:%s)\w*" % "|".join(map(re.escape, stems)), re.IGNORECASE)
+
+    first = pattern.search(text)
+    start = max(0, first.start() - width // 3) if first else 0
+    end = min(len(text), start + width)
+    window = text[start:end]
+
+    out, pos = [], 0
+    for m in pattern.finditer(window):
+        out.append(html.escape(window[pos:m.start()]))
+        out.append("<mark>%s</mark>" % html.escape(m.group()))
+        pos = m.end()
+    out.append(html.escape(window[pos:]))
+    return ("…" if start > 0 else "") + "".join(out) + ("…" if end < len(text) else "")
+
+def parse_search_args(args):
+    """(q, page, limit) from a request's query string; raises ValueError."""
+    q = (args.get("q") or "").strip()
+    if not q or len(q) > MAX_QUERY_CHARS:
+        raise ValueError(f"q is required (max {MAX_QUERY_CHARS} characters)")
+    try:
+        return q, int(args.get("page", 1)), int(args.get("limit", 20))
+    except ValueError:
+        raise ValueError("page and limit must be integers")
+
+def search_notes(scope: Dict, q: str, page: int, limit: int) -> Dict:
+    """
+    Ranked search within `scope` (e.g. {"doctor_email": ...}).
+    Raises ValueError for bad paging or a query Mongo rejects.
+    """
+    if page < 1 or not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"page must be >= 1 and limit between 1 and {MAX_LIMIT}")
+    skip = (page - 1) * limit
+    if skip + limit > MAX_RESULTS:
+        raise ValueError(f"only the first {MAX_RESULTS} results can be paged through; refine the query")
+
+    query = {"$text": {"$search": q}, **scope}
+    score = {"score": {"$meta": "textScore"}}
+    try:
+        total = db.notes.count_documents(query, limit=MAX_RESULTS)
+        cursor = db.notes.find(query, score).sort([("score", {"$meta": "textScore"}), ("created_at", -1)])
+        notes = list(cursor.skip(skip).limit(limit))
+    except OperationFailure as e:
+        raise ValueError(f"invalid search: {e.details.get('errmsg', e) if e.details else e}")
+
+    terms = _query_terms(q)
+    for note in notes:
+        note["snippet"] = highlight(note.get("note") or "", terms)
+    return {"notes": notes, "page": page, "limit": limit, "total": total,
+            "total_capped": total >= MAX_RESULTS}
@@ -0,0 +1,138 @@
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from pymongo import ReturnDocument
+from app.database import db
+
+# Admission control for model inference routes:
+# 1) a token bucket per (JWT identity, role): "<requests>/<seconds>", burst = requests
+# 2) a cap on concurrent inferences per worker process; excess requests are turned
+#    away immediately instead of queueing behind the model and ledger hashing.
+RATE_LIMITS = {
+    "patient": os.getenv("INFERENCE_RATE_LIMIT_PATIENT", "10/60"),
+    "doctor": os.getenv("INFERENCE_RATE_LIMIT_DOCTOR", "60/60"),
+}
+DEFAULT_RATE_LIMIT = os.getenv("INFERENCE_RATE_LIMIT_DEFAULT", "5/60")
+MAX_INFLIGHT_INFERENCES = int(os.getenv("MAX_INFLIGHT_INFERENCES", "4"))
+# local (per process) or mongo (shared by all workers)
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "local")
+# INFERENCE_LIMITS=0 turns both checks off (load tests, see bench/)
+INFERENCE_LIMITS = os.getenv("INFERENCE_LIMITS", "1") == "1"
+BUCKET_SWEEP_SECONDS = 60
+
+
+def parse_rate(spec: str):
+    """"10/60" -> (capacity 10, refill 10/60 tokens per second)."""
+    count, seconds = spec.split("/")
+    return float(count), float(count) / float(seconds)
+
+
+class LocalBucketStore:
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, last refill time, capacity, rate)
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def take(self, key, capacity, rate):
+        """Consume one token. Returns (allowed, seconds until a token is available)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, _, _ = self._buckets.get(key, (capacity, now, capacity, rate))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, capacity, rate)
+            if now - self._last_sweep >= BUCKET_SWEEP_SECONDS:
+                self._sweep(now)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def refund(self, key, capacity, rate):
+        """Give back a token taken for a request that was not served."""
+        with self._lock:
+            if key in self._buckets:
+                tokens, last, _, _ = self._buckets[key]
+                self._buckets[key] = (min(capacity, tokens + 1), last, capacity, rate)
+
+    def _sweep(self, now):
+        # a bucket that has refilled completely is the same as no bucket at all
+        self._buckets = {
+            key: b for key, b in self._buckets.items()
+            if b[0] + (now - b[1]) * b[3] < b[2]
+        }
+        self._last_sweep = now
+
+
+class MongoBucketStore:
+    """
+    Same bucket, kept in db.rate_limits and updated atomically with a single
+    pipeline-style find_one_and_update, so every worker shares one budget.
+    """
+
+    def take(self, key, capacity, rate):
+        now = time.time()
+        doc = db.rate_limits.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": {"$min": [capacity, {"$add": [
+                    {"$ifNull": ["$tokens", capacity]},
+                    {"$multiply": [{"$subtract": [now, {"$ifNull": ["$ts", now]}]}, rate]},
+                ]}]}}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}, "ts": now,
+                          "expires_at": datetime.utcnow() + timedelta(seconds=capacity / rate)}},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        allowed = doc["allowed"]
+        return allowed, 0.0 if allowed else (1 - doc["tokens"]) / rate
+
+    def refund(self, key, capacity, rate):
+        db.rate_limits.update_one(
+            {"_id": key},
+            [{"$set": {"tokens": {"$min": [capacity, {"$add": ["$tokens", 1]}]}}}],
+        )
+
+
+_store = MongoBucketStore() if RATE_LIMIT_STORE == "mongo" else LocalBucketStore()
+_inflight = threading.BoundedSemaphore(MAX_INFLIGHT_INFERENCES)
+
+
+def _reject(status, message, retry_after):
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def limit_inference(view):
+    """
+    Apply per-user rate limiting + the in-flight cap. Place below @jwt_required().
+    429 = this user is over their budget, 503 = this worker is saturated.
+    """
+    if not INFERENCE_LIMITS:
+        return view
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        role = get_jwt().get("role")
+        capacity, rate = parse_rate(RATE_LIMITS.get(role, DEFAULT_RATE_LIMIT))
+        key = f"inference:{role}:{get_jwt_identity()}"
+        allowed, retry_after = _store.take(key, capacity, rate)
+        if not allowed:
+            return _reject(429, "Too many prediction requests, please retry later", retry_after)
+
+        if not _inflight.acquire(blocking=False):
+            _store.refund(key, capacity, rate)  # not served, so it shouldn't count
+            return _reject(503, "Prediction service is busy, please retry shortly", 1)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            _inflight.release()
+    return wrapper
@@ -0,0 +1,33 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """
+    Collects wall-clock timings for named startup stages (imports, initializers).
+    Disabled profilers still run the wrapped code, they just don't record anything.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages = []  # [(name, seconds)]
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def report(self) -> str:
+        width = max((len(name) for name, _ in self.stages), default=10)
+        lines = [f"{'stage'.ljust(width)}  time (ms)"]
+        for name, seconds in self.stages:
+            lines.append(f"{name.ljust(width)}  {seconds * 1000:9.1f}")
+        total = sum(seconds for _, seconds in self.stages)
+        lines.append(f"{'total'.ljust(width)}  {total * 1000:9.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,75 @@
+# bench/__main__.py
+# Usage (from backend/):
+#   python -m bench seed --patients 500 --reset
+#   python -m bench run --output bench_results.json
+#   python -m bench compare bench_results.json
+import argparse
+import os
+import shutil
+import sys
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Load/latency benchmark suite.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("seed", help="Insert synthetic users, profiles, predictions, notes, appointments and ledger blocks.")
+    s.add_argument("--patients", type=int, default=200)
+    s.add_argument("--doctors", type=int, default=10)
+    s.add_argument("--predictions-per-patient", type=int, default=10)
+    s.add_argument("--notes-per-patient", type=int, default=5)
+    s.add_argument("--appointments-per-patient", type=int, default=3)
+    s.add_argument("--ledger-blocks", type=int, default=1000)
+    s.add_argument("--reset", action="store_true", help="Drop the benchmark collections first (use a dedicated DB_NAME!).")
+
+    r = sub.add_parser("run", help="Drive the API at fixed concurrency and record p50/p95/p99 + throughput.")
+    r.add_argument("--base-url", default="http://127.0.0.1:5000")
+    r.add_argument("--requests", type=int, default=500, help="Requests per scenario.")
+    r.add_argument("--concurrency", type=int, default=8)
+    r.add_argument("--users", type=int, default=20, help="Seeded patients to log in as (doctors = users/10).")
+    r.add_argument("--only", nargs="*", help="Run only these scenarios.")
+    r.add_argument("--output", default="bench_results.json")
+    r.add_argument("--save-baseline", action="store_true", help="Also copy the results to bench/baseline.json.")
+
+    c = sub.add_parser("compare", help="Fail if results regressed against the committed baseline.")
+    c.add_argument("results")
+    c.add_argument("--baseline", default=BASELINE_PATH)
+    c.add_argument("--max-latency-regression", type=float, default=0.20)
+    c.add_argument("--max-throughput-regression", type=float, default=0.20)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "seed":
+        from bench.seed import seed
+        seed(patients=args.patients, doctors=args.doctors,
+             predictions_per_patient=args.predictions_per_patient,
+             notes_per_patient=args.notes_per_patient,
+             appointments_per_patient=args.appointments_per_patient,
+             ledger_blocks=args.ledger_blocks, reset=args.reset)
+        return 0
+
+    if args.command == "run":
+        from bench.runner import run
+        run(base_url=args.base_url, requests=args.requests, concurrency=args.concurrency,
+            users=args.users, only=args.only, output=args.output)
+        if args.save_baseline:
+            shutil.copyfile(args.output, BASELINE_PATH)
+            print(f"Baseline updated: {BASELINE_PATH}")
+        return 0
+
+    from bench.compare import compare_files
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; record one with `python -m bench run --save-baseline`.")
+        return 2
+    regressions = compare_files(args.results, args.baseline,
+                                max_latency_regression=args.max_latency_regression,
+                                max_throughput_regression=args.max_throughput_regression)
+    for line in regressions:
+        print("REGRESSION", line)
+    if not regressions:
+        print("No regressions against baseline.")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
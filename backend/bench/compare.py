@@ -0,0 +1,36 @@
+# bench/compare.py
+# Compare a benchmark result file against the committed baseline.
+import json
+
+def compare(results, baseline, max_latency_regression=0.20, max_throughput_regression=0.20):
+    """
+    Return a list of human-readable regressions. A scenario regresses when its
+    p95/p99 latency grew, or its throughput dropped, by more than the allowed
+    fraction relative to the baseline.
+    """
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = results.get("scenarios", {}).get(name)
+        if current is None:
+            regressions.append(f"{name}: missing from results")
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if base.get(key) and current.get(key) is not None:
+                limit = base[key] * (1 + max_latency_regression)
+                if current[key] > limit:
+                    regressions.append(f"{name}: {key} {current[key]:.2f} > {limit:.2f} (baseline {base[key]:.2f})")
+        if base.get("throughput_rps") and current.get("throughput_rps") is not None:
+            floor = base["throughput_rps"] * (1 - max_throughput_regression)
+            if current["throughput_rps"] < floor:
+                regressions.append(f"{name}: throughput {current['throughput_rps']:.1f} < {floor:.1f} "
+                                   f"(baseline {base['throughput_rps']:.1f})")
+        if current.get("errors", 0) > base.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} errors (baseline {base.get('errors', 0)})")
+    return regressions
+
+def compare_files(results_path, baseline_path, **thresholds):
+    with open(results_path) as f:
+        results = json.load(f)
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    return compare(results, baseline, **thresholds)
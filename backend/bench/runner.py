@@ -0,0 +1,126 @@
+# bench/runner.py
+# Drive the running API at a fixed concurrency and record latency percentiles.
+import json
+import platform
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from bench.seed import BENCH_PASSWORD, patient_email, doctor_email
+
+
+def _request(base_url, method, path, token=None, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    if data is not None:
+        req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(req, timeout=30) as res:
+            payload = res.read()
+            return res.status, payload
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def login(base_url, email):
+    status, payload = _request(base_url, "POST", "/auth/login",
+                               body={"email": email, "password": BENCH_PASSWORD})
+    if status != 200:
+        raise RuntimeError(f"login failed for {email} ({status}); did you run `python -m bench seed`?")
+    return json.loads(payload)["token"]
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def scenarios(patient_tokens, doctor_tokens, patient_emails):
+    """
+    name -> callable(i) returning (method, path, token, body) for the i-th request.
+    Requests rotate over the logged-in users so caches see realistic key spread.
+    """
+    def p(i): return patient_tokens[i % len(patient_tokens)]
+    def d(i): return doctor_tokens[i % len(doctor_tokens)]
+    def pe(i): return patient_emails[i % len(patient_emails)]
+    terms = ["", "asth", "hyper", "diab", "resp"]
+    return {
+        # stored profile, unchanged since the last call: served from last_prediction
+        "predict": lambda i: ("POST", "/api/predict", p(i), {}),
+        # an override forces encoding and predict_proba on every request
+        "predict_model": lambda i: ("POST", "/api/predict", p(i), {"age": 5 + i % 86}),
+        "catalog_list": lambda i: ("GET", f"/catalog/?q={terms[i % len(terms)]}", None, None),
+        "patient_notes": lambda i: ("GET", "/patients/notes", p(i), None),
+        "doctor_patient_notes": lambda i: ("GET", f"/doctors/patients/{pe(i)}/notes", d(i), None),
+        "appointments_mine": lambda i: ("GET", "/appointments/mine", p(i), None),
+        "appointments_incoming": lambda i: ("GET", "/appointments/incoming", d(i), None),
+        "blockchain_list": lambda i: ("GET", "/blockchain/", None, None),
+        "blockchain_valid": lambda i: ("GET", "/blockchain/valid", None, None),
+    }
+
+def run_scenario(base_url, make_request, requests, concurrency):
+    def one(i):
+        method, path, token, body = make_request(i)
+        start = time.perf_counter()
+        status, _ = _request(base_url, method, path, token, body)
+        return time.perf_counter() - start, status
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - wall_start
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    errors = sum(1 for r in results if r[1] >= 400)
+    throttled = sum(1 for r in results if r[1] in (429, 503))
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throttled": throttled,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "throughput_rps": requests / wall if wall > 0 else None,
+    }
+
+def run(base_url="http://127.0.0.1:5000", requests=500, concurrency=8, users=20,
+        only=None, output=None):
+    patients = [patient_email(i) for i in range(users)]
+    doctors = [doctor_email(i) for i in range(max(1, users // 10))]
+    patient_tokens = [login(base_url, e) for e in patients]
+    doctor_tokens = [login(base_url, e) for e in doctors]
+
+    results = {
+        "meta": {
+            "base_url": base_url,
+            "requests": requests,
+            "concurrency": concurrency,
+            "users": users,
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "scenarios": {},
+    }
+    for name, make_request in scenarios(patient_tokens, doctor_tokens, patients).items():
+        if only and name not in only:
+            continue
+        # one untimed request so lazy initializers (model, ledger) are not measured
+        _request(base_url, *make_request(0))
+        results["scenarios"][name] = stats = run_scenario(base_url, make_request, requests, concurrency)
+        print(f"{name:24s} p50={stats['p50_ms']:8.2f}ms p95={stats['p95_ms']:8.2f}ms "
+              f"p99={stats['p99_ms']:8.2f}ms {stats['throughput_rps']:8.1f} req/s errors={stats['errors']}")
+        if stats["throttled"]:
+            print(f"  warning: {stats['throttled']} requests got 429/503, so this timed the rejection path; "
+                  "start the server with INFERENCE_LIMITS=0 to benchmark the model path")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {output}")
+    return results
@@ -0,0 +1,151 @@
+# bench/seed.py
+# Seed a local MongoDB with synthetic data for the benchmark suite.
+# Run from backend/: python -m bench seed --patients 500 --doctors 20
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from werkzeug.security import generate_password_hash
+
+from app.database import db
+from app.blockchain import Block
+from app.prediction_store import compact_prediction_doc
+from app.routes.prediction_routes import (
+    FEATURE_ORDER, _encode_input, _to_vector, get_model_version, precomputed_profile_fields,
+)
+
+BENCH_PASSWORD = "bench-password"
+BENCH_COLLECTIONS = ["users", "patients", "predictions", "feature_schemas", "notes", "appointments", "blockchain"]
+
+def patient_email(i): return f"bench-patient-{i}@example.com"
+def doctor_email(i): return f"bench-doctor-{i}@example.com"
+
+def _random_profile(rng):
+    yes_no = ["Yes", "No"]
+    levels = ["Low", "Normal", "High"]
+    return {
+        "gender": rng.choice(["Male", "Female"]),
+        "age": rng.randint(5, 90),
+        "fever": rng.choice(yes_no),
+        "cough": rng.choice(yes_no),
+        "fatigue": rng.choice(yes_no),
+        "difficulty_breathing": rng.choice(yes_no),
+        "blood_pressure": rng.choice(levels),
+        "cholesterol_level": rng.choice(levels),
+        "survey_completed": True,
+    }
+
+def _insert_batched(collection, docs, batch_size=1000):
+    batch = []
+    for d in docs:
+        batch.append(d)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+def seed(patients=200, doctors=10, predictions_per_patient=10, notes_per_patient=5,
+         appointments_per_patient=3, ledger_blocks=1000, reset=False, rng_seed=42):
+    rng = random.Random(rng_seed)
+    start = time.perf_counter()
+
+    if reset:
+        for name in BENCH_COLLECTIONS:
+            db[name].drop()
+
+    # Hash once: password hashing is deliberately slow and would dominate seeding.
+    hashed_pw = generate_password_hash(BENCH_PASSWORD)
+    users = [{"first_name": "Bench", "last_name": f"Patient{i}", "email": patient_email(i),
+              "password": hashed_pw, "role": "patient"} for i in range(patients)]
+    users += [{"first_name": "Bench", "last_name": f"Doctor{i}", "email": doctor_email(i),
+               "password": hashed_pw, "role": "doctor"} for i in range(doctors)]
+    _insert_batched(db.users, users)
+
+    profiles = {patient_email(i): _random_profile(rng) for i in range(patients)}
+    _insert_batched(db.patients, (
+        {"email": e, **p, **precomputed_profile_fields(p), "profile_version": 1}
+        for e, p in profiles.items()
+    ))
+
+    now = datetime.utcnow()
+
+    model_version = get_model_version()
+
+    def predictions():
+        for email, profile in profiles.items():
+            vector = _to_vector(_encode_input(profile))
+            for _ in range(predictions_per_patient):
+                p1 = rng.random()
+                yield compact_prediction_doc(
+                    email, vector, FEATURE_ORDER, model_version,
+                    {"label": int(p1 >= 0.5), "probability": p1},
+                    now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+                )
+    _insert_batched(db.predictions, predictions())
+
+    def notes():
+        for i, email in enumerate(profiles):
+            for n in range(notes_per_patient):
+                created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+                yield {
+                    "patient_email": email,
+                    "prediction_id": None,
+                    "note": f"Synthetic follow-up note {n} for patient {i}: monitor cough and fever.",
+                    "visible_to_patient": rng.random() < 0.8,
+                    "doctor_email": doctor_email(rng.randrange(doctors)),
+                    "created_at": created,
+                    "updated_at": created,
+                }
+    _insert_batched(db.notes, notes())
+
+    def appointments():
+        for email in profiles:
+            for _ in range(appointments_per_patient):
+                when = datetime.now(timezone.utc) + timedelta(hours=rng.randint(1, 24 * 60))
+                stamp = datetime.now(timezone.utc).isoformat()
+                yield {
+                    "patient_email": email,
+                    "doctor_email": doctor_email(rng.randrange(doctors)),
+                    "requested_time": when.strftime("%Y-%m-%dT%H:00:00Z"),
+                    "reason": "Synthetic check-up",
+                    "status": rng.choice(["pending", "accepted", "rejected"]),
+                    "created_at": stamp,
+                    "updated_at": stamp,
+                }
+    _insert_batched(db.appointments, appointments())
+
+    # Ledger: continue from the current tip so the chain stays valid.
+    tip = db.blockchain.find_one(sort=[("index", -1)])
+    if tip is None:
+        previous = Block(index=0, timestamp=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                         data={"message": "Genesis Block"}, previous_hash="0")
+        db.blockchain.insert_one(previous.to_dict())
+    else:
+        previous = Block(index=tip["index"], timestamp=tip["timestamp"], data=tip["data"],
+                         previous_hash=tip["previous_hash"], hash_value=tip["hash"])
+
+    def blocks():
+        nonlocal previous
+        emails = list(profiles) or ["bench@example.com"]
+        for _ in range(ledger_blocks):
+            p1 = rng.random()
+            block = Block(
+                index=previous.index + 1,
+                timestamp=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                data={"patient_email": rng.choice(emails), "prediction_id": None,
+                      "label": int(p1 >= 0.5), "probability": p1,
+                      "created_at": now.isoformat() + "Z"},
+                previous_hash=previous.hash,
+            )
+            previous = block
+            yield block.to_dict()
+    _insert_batched(db.blockchain, blocks())
+
+    # the notes/appointment list ETags come from per-scope counters; invalidate them all
+    db.resource_versions.update_many({"_id": {"$regex": "^(notes|appointments):"}}, {"$inc": {"version": 1}})
+
+    print(f"Seeded {patients} patients, {doctors} doctors, "
+          f"{patients * predictions_per_patient} predictions, {patients * notes_per_patient} notes, "
+          f"{patients * appointments_per_patient} appointments, {ledger_blocks} ledger blocks "
+          f"in {time.perf_counter() - start:.1f}s.")
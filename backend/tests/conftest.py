@@ -0,0 +1,35 @@
+import os
+import sys
+
+from pymongo.errors import BulkWriteError
+
+# run from backend/ or the repo root: make `app` importable either way
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeSlotCollection:
+    """Just enough of db.appointment_slots for claim_slots/release_slots (unique _id)."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def insert_many(self, docs, ordered=True):
+        for i, doc in enumerate(docs):
+            if doc["_id"] in self.docs:
+                raise BulkWriteError({"nInserted": i, "writeErrors": [{"index": i, "code": 11000}]})
+            self.docs[doc["_id"]] = dict(doc)
+
+    def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+    def delete_many(self, query):
+        ids = query["_id"]["$in"] if "_id" in query else list(self.docs)
+        for _id in ids:
+            doc = self.docs.get(_id)
+            if doc and doc["appointment_id"] == query["appointment_id"]:
+                del self.docs[_id]
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.appointment_slots = FakeSlotCollection()
@@ -0,0 +1,69 @@
+import pytest
+
+from app.drift import (
+    AGE_BINS, PROBA_BINS, DriftSketch, compare, ks, merge_docs, psi, quantiles,
+)
+
+FEATURES = ["Age", "Fever_Yes"]
+
+
+def sketch(rows):
+    s = DriftSketch(FEATURES)
+    for age, fever, p in rows:
+        s.add([age, fever], p)
+    return s
+
+
+def test_psi_and_ks_are_zero_for_identical_distributions():
+    hist = [5, 10, 0, 3]
+    assert psi(hist, hist) == pytest.approx(0.0)
+    assert ks(hist, [2 * n for n in hist]) == pytest.approx(0.0)
+
+def test_psi_known_value():
+    # 50/50 -> 90/10: (0.9-0.5)ln(0.9/0.5) + (0.1-0.5)ln(0.1/0.5)
+    assert psi([50, 50], [90, 10]) == pytest.approx(0.4 * 0.5878 + 0.4 * 1.6094, rel=1e-3)
+
+def test_ks_is_max_cdf_gap():
+    assert ks([1, 0, 0, 0], [0, 0, 0, 1]) == pytest.approx(1.0)
+    assert ks([1, 1, 0, 0], [0, 1, 1, 0]) == pytest.approx(0.5)
+
+def test_quantiles_from_histogram():
+    counts = [0] * AGE_BINS
+    for age in range(20, 30):
+        counts[age] = 1
+    assert quantiles(counts) == {"p10": 20, "p50": 24, "p90": 28}
+    assert quantiles([0] * AGE_BINS) == {"p10": None, "p50": None, "p90": None}
+
+def test_sketch_clamps_ages_and_probabilities():
+    doc = sketch([(-3, 0, 0.0), (150, 1, 1.0), (40, 1, 0.5)]).to_doc()
+    assert doc["count"] == 3
+    assert doc["age"] == {"0": 1, str(AGE_BINS - 1): 1, "40": 1}
+    assert doc["proba"] == {"0": 1, str(PROBA_BINS - 1): 1, str(PROBA_BINS // 2): 1}
+    assert doc["sum"]["Fever_Yes"] == 2
+
+def test_to_inc_round_trips_through_merge():
+    s = sketch([(30, 1, 0.2), (31, 0, 0.7)])
+    inc = s.to_inc()
+    nested = {"count": inc.pop("count")}
+    for key, value in inc.items():
+        section, field = key.split(".", 1)
+        nested.setdefault(section, {})[field] = value
+    assert merge_docs([nested, nested])["count"] == 4
+    assert merge_docs([nested]) == merge_docs([s.to_doc()])
+
+def test_compare_flags_shifted_population():
+    reference = merge_docs([sketch([(30 + i % 10, i % 2, 0.2) for i in range(200)]).to_doc()])
+    same = merge_docs([sketch([(30 + i % 10, i % 2, 0.2) for i in range(100)]).to_doc()])
+    older = merge_docs([sketch([(70 + i % 10, 1, 0.9) for i in range(100)]).to_doc()])
+
+    stable = compare(reference, same)
+    assert stable["age"]["status"] == "stable"
+    assert stable["probability"]["psi"] == pytest.approx(0.0)
+    assert stable["features"]["Fever_Yes"]["status"] == "stable"
+
+    drifted = compare(reference, older)
+    assert drifted["age"]["status"] == "significant"
+    assert drifted["age"]["ks"] == pytest.approx(1.0)
+    assert drifted["probability"]["status"] == "significant"
+    assert drifted["features"]["Fever_Yes"]["status"] == "significant"
+    assert drifted["features"]["Age"]["mean_shift_sd"] > 10
@@ -0,0 +1,67 @@
+import pytest
+
+from app.utils import rate_limit
+from app.utils.rate_limit import LocalBucketStore, parse_rate
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_parse_rate():
+    assert parse_rate("10/60") == (10.0, 10.0 / 60)
+
+def test_bucket_allows_burst_then_rejects(clock):
+    store = LocalBucketStore()
+    capacity, rate = parse_rate("3/60")
+    assert all(store.take("u", capacity, rate)[0] for _ in range(3))
+    allowed, retry_after = store.take("u", capacity, rate)
+    assert not allowed
+    assert retry_after == pytest.approx(20.0)
+
+def test_bucket_refills_over_time(clock):
+    store = LocalBucketStore()
+    capacity, rate = parse_rate("1/10")
+    assert store.take("u", capacity, rate)[0]
+    clock.now += 5
+    assert not store.take("u", capacity, rate)[0]
+    clock.now += 5
+    assert store.take("u", capacity, rate)[0]
+
+def test_buckets_are_per_key(clock):
+    store = LocalBucketStore()
+    assert store.take("a", 1, 0.01)[0]
+    assert store.take("b", 1, 0.01)[0]
+    assert not store.take("a", 1, 0.01)[0]
+
+def test_refund_returns_a_token_up_to_capacity(clock):
+    store = LocalBucketStore()
+    assert store.take("u", 1, 0.01)[0]
+    store.refund("u", 1, 0.01)
+    assert store.take("u", 1, 0.01)[0]
+    store.refund("u", 1, 0.01)
+    store.refund("u", 1, 0.01)
+    assert store.take("u", 1, 0.01)[0]
+    assert not store.take("u", 1, 0.01)[0]
+
+def test_sweep_evicts_refilled_buckets_only(clock):
+    store = LocalBucketStore()
+    store.take("idle", 2, 1.0)
+    store.take("busy", 2, 0.001)
+    store.take("busy", 2, 0.001)
+    clock.now += rate_limit.BUCKET_SWEEP_SECONDS
+    store.take("new", 2, 1.0)  # triggers the sweep
+    assert "idle" not in store._buckets
+    assert "busy" in store._buckets
+    assert not store.take("busy", 2, 0.001)[0]
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from app import scheduling
+from app.scheduling import IntervalIndex, parse_utc, parse_windows, within_availability, free_slots
+from conftest import FakeDatabase
+
+
+def at(day, hour, minute=0):
+    return datetime(2030, 1, day, hour, minute, tzinfo=timezone.utc)  # 2030-01-07 is a Monday
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = FakeDatabase()
+    monkeypatch.setattr(scheduling, "db", fake)
+    return fake
+
+
+# --------- claim_slots ---------
+
+def test_claim_slots_one_slot_per_15_minutes(fake_db):
+    appt = ObjectId()
+    assert scheduling.claim_slots("doc", at(7, 9), at(7, 10), appt)
+    assert len(fake_db.appointment_slots.docs) == 4
+
+def test_claim_slots_conflict_rolls_back_only_own_slots(fake_db):
+    first, second = ObjectId(), ObjectId()
+    assert scheduling.claim_slots("doc", at(7, 9, 30), at(7, 10), first)
+    # 09:00-10:00 inserts 09:00 and 09:15, then collides with `first` at 09:30
+    assert not scheduling.claim_slots("doc", at(7, 9), at(7, 10), second)
+    owners = {d["appointment_id"] for d in fake_db.appointment_slots.docs.values()}
+    assert owners == {first}
+    assert len(fake_db.appointment_slots.docs) == 2
+
+def test_claim_slots_repeated_claim_by_same_appointment_succeeds(fake_db):
+    appt = ObjectId()
+    assert scheduling.claim_slots("doc", at(7, 9), at(7, 10), appt)
+    assert scheduling.claim_slots("doc", at(7, 9), at(7, 10), appt)
+    assert len(fake_db.appointment_slots.docs) == 4
+
+def test_claim_slots_partial_overlap_with_own_slots(fake_db):
+    appt = ObjectId()
+    assert scheduling.claim_slots("doc", at(7, 9, 30), at(7, 10), appt)
+    assert scheduling.claim_slots("doc", at(7, 9), at(7, 10, 30), appt)
+    assert len(fake_db.appointment_slots.docs) == 6
+
+def test_claim_slots_is_per_doctor(fake_db):
+    assert scheduling.claim_slots("doc-a", at(7, 9), at(7, 10), ObjectId())
+    assert scheduling.claim_slots("doc-b", at(7, 9), at(7, 10), ObjectId())
+
+def test_release_slots(fake_db):
+    appt = ObjectId()
+    scheduling.claim_slots("doc", at(7, 9), at(7, 10), appt)
+    scheduling.release_slots(appt)
+    assert fake_db.appointment_slots.docs == {}
+
+
+# --------- parsing and availability ---------
+
+def test_parse_utc_defaults_to_utc_and_converts_offsets():
+    assert parse_utc("2030-01-07T09:00:00") == at(7, 9)
+    assert parse_utc("2030-01-07T09:00:00Z") == at(7, 9)
+    assert parse_utc("2030-01-07T11:00:00+02:00") == at(7, 9)
+
+@pytest.mark.parametrize("windows", [
+    "monday",
+    [{"weekday": 7, "start": "09:00", "end": "17:00"}],
+    [{"weekday": 0, "start": "17:00", "end": "09:00"}],
+    [{"weekday": 0, "start": "09:10", "end": "17:00"}],
+    [{"weekday": 0, "start": "9am", "end": "17:00"}],
+])
+def test_parse_windows_rejects_invalid(windows):
+    with pytest.raises(ValueError):
+        parse_windows(windows)
+
+def test_within_availability():
+    windows = parse_windows([{"weekday": 0, "start": "09:00", "end": "12:00"}])
+    assert within_availability(windows, at(7, 9), at(7, 10))
+    assert within_availability(windows, at(7, 11), at(7, 12))
+    assert not within_availability(windows, at(7, 11, 30), at(7, 12, 30))
+    assert not within_availability(windows, at(8, 9), at(8, 10))  # Tuesday
+    assert within_availability([], at(8, 3), at(8, 4))
+
+
+# --------- IntervalIndex ---------
+
+def test_interval_index_empty():
+    assert not IntervalIndex().overlaps(at(7, 9), at(7, 10))
+
+def test_interval_index_half_open_intervals():
+    index = IntervalIndex([(at(7, 10), at(7, 11))])
+    assert not index.overlaps(at(7, 9), at(7, 10))    # ends where the booking starts
+    assert not index.overlaps(at(7, 11), at(7, 12))   # starts where the booking ends
+    assert index.overlaps(at(7, 10, 30), at(7, 10, 45))
+    assert index.overlaps(at(7, 9), at(7, 12))
+
+def test_interval_index_long_earlier_interval_is_not_missed():
+    # the interval just before the query is short, but an earlier one spans it
+    index = IntervalIndex([(at(7, 8), at(7, 18)), (at(7, 9), at(7, 9, 15))])
+    assert index.overlaps(at(7, 12), at(7, 13))
+
+def test_interval_index_matches_brute_force():
+    intervals = [(at(7, h), at(7, h) + timedelta(minutes=m))
+                 for h, m in [(8, 30), (9, 90), (13, 15), (15, 120), (16, 15)]]
+    index = IntervalIndex(intervals)
+    for start_min in range(6 * 60, 20 * 60, 15):
+        start = at(7, 0) + timedelta(minutes=start_min)
+        end = start + timedelta(minutes=30)
+        expected = any(s < end and start < e for s, e in intervals)
+        assert index.overlaps(start, end) == expected, start
+
+
+# --------- free_slots ---------
+
+def test_free_slots_skips_booked_and_unavailable_time(monkeypatch):
+    windows = parse_windows([{"weekday": 0, "start": "09:00", "end": "12:00"}])
+    monkeypatch.setattr(scheduling, "get_windows", lambda email: windows)
+    monkeypatch.setattr(scheduling, "get_interval_index",
+                        lambda email: IntervalIndex([(at(7, 10), at(7, 11))]))
+
+    slots = free_slots("doc", at(7, 0), at(9, 0), slot_minutes=60)
+    assert [s["start"] for s in slots] == [at(7, 9), at(7, 11)]